@@ -0,0 +1,29 @@
+"""add users.token_version
+
+Revision ID: 7c2d9e41b8a3
+Revises: 0ea01e5f66ee
+Create Date: 2026-10-17 10:12:44.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2d9e41b8a3'
+down_revision: Union[str, None] = '0ea01e5f66ee'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'users',
+        sa.Column('token_version', sa.Integer(), server_default='0', nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,24 @@
+# app/api/v1/endpoints/metrics_api.py
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.core.metrics import metrics_publisher
+from app.core.security import get_current_active_user_web
+from app.db.models.user_model import User
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+async def require_superuser(user: Annotated[User, Depends(get_current_active_user_web)]) -> User:
+    if not user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions."
+        )
+    return user
+
+
+@router.get("/", name="metrics", dependencies=[Depends(require_superuser)])
+async def get_metrics() -> dict[str, Any]:
+    """Connection-pool, hashing-pool and JWT-cache metrics of every live worker."""
+    return {"workers": await metrics_publisher.read_all()}
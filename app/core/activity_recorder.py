@@ -0,0 +1,172 @@
+# app/core/activity_recorder.py
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+import redis.asyncio as aioredis
+from sqlalchemy import DateTime, Integer, column, inspect, or_, update, values
+
+from app.core.config import settings
+from app.db import database
+from app.db.database import redis_pool
+from app.db.models.user_model import User
+
+logger = logging.getLogger(__name__)
+
+# Atomically takes the whole pending hash, so concurrent flushes from several
+# workers never write the same entry twice.
+DRAIN_LUA = """
+local entries = redis.call('HGETALL', KEYS[1])
+redis.call('DEL', KEYS[1])
+return entries
+"""
+
+
+class ActivityRecorder:
+    """
+    Write-behind recorder for `users.last_login_at`.
+
+    Logins and token refreshes only record a timestamp in Redis (or, if Redis is down, in
+    this worker's memory); a background task flushes the pending entries every
+    `flush_interval` seconds with one `UPDATE users ... FROM (VALUES ...)`. That replaces
+    one row UPDATE per request and the row-lock contention on busy accounts.
+
+    A separate per-user key keeps the latest timestamp after a flush, so pages read the
+    freshest value through `last_login_at()` instead of the possibly stale user row.
+    """
+
+    def __init__(
+        self,
+        *,
+        flush_interval: float,
+        key_prefix: str = "activity:",
+        last_seen_ttl: int = 7 * 24 * 60 * 60,
+    ):
+        self.flush_interval = flush_interval
+        self.key_prefix = key_prefix
+        self.last_seen_ttl = last_seen_ttl
+        self._local_pending: dict[int, datetime] = {}
+        self._drain_script = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def _pending_key(self) -> str:
+        return f"{self.key_prefix}pending"
+
+    def _last_seen_key(self, user_id: int) -> str:
+        return f"{self.key_prefix}last_seen:{user_id}"
+
+    def _redis(self) -> aioredis.Redis:
+        return aioredis.Redis(connection_pool=redis_pool)
+
+    def _buffer_locally(self, user_id: int, when: datetime) -> None:
+        current = self._local_pending.get(user_id)
+        if current is None or current < when:
+            self._local_pending[user_id] = when
+
+    # --- Recording and reading ---
+    async def record(self, user_id: int, when: Optional[datetime] = None) -> None:
+        when = when or datetime.now(timezone.utc)
+        try:
+            async with self._redis().pipeline(transaction=True) as pipe:
+                pipe.hset(self._pending_key, str(user_id), when.isoformat())
+                pipe.set(self._last_seen_key(user_id), when.isoformat(), ex=self.last_seen_ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Activity recorder: Redis write failed for user {user_id}: {e}")
+            self._buffer_locally(user_id, when)
+
+    async def last_login_at(self, user: User) -> Optional[datetime]:
+        """Freshest last-login time: the buffered value or the one on the user row."""
+        # Users built from stateless token claims do not carry the column at all
+        stored = None if "last_login_at" in inspect(user).unloaded else user.last_login_at
+        candidates = [stored, self._local_pending.get(user.id)]
+        try:
+            raw = await self._redis().get(self._last_seen_key(user.id))
+            if raw:
+                candidates.append(datetime.fromisoformat(raw))
+        except Exception as e:
+            logger.warning(f"Activity recorder: Redis read failed for user {user.id}: {e}")
+        return max((c for c in candidates if c is not None), default=None)
+
+    # --- Flushing ---
+    async def _drain(self) -> dict[int, datetime]:
+        pending, self._local_pending = self._local_pending, {}
+        try:
+            if self._drain_script is None:
+                self._drain_script = self._redis().register_script(DRAIN_LUA)
+            flat = await self._drain_script(keys=[self._pending_key])
+        except Exception as e:
+            logger.warning(f"Activity recorder: could not drain Redis buffer: {e}")
+            return pending
+        for user_id, when in zip(flat[::2], flat[1::2]):
+            user_id, when = int(user_id), datetime.fromisoformat(when)
+            if user_id not in pending or pending[user_id] < when:
+                pending[user_id] = when
+        return pending
+
+    async def flush(self) -> int:
+        """Writes all pending timestamps in one statement; returns the number of rows sent."""
+        pending = await self._drain()
+        if not pending:
+            return 0
+
+        batch = values(
+            column("id", Integer),
+            column("last_login_at", DateTime(timezone=True)),
+            name="activity",
+        ).data(list(pending.items()))
+        users = User.__table__
+        statement = (
+            update(users)
+            .where(users.c.id == batch.c.id)
+            .where(
+                or_(
+                    users.c.last_login_at.is_(None),
+                    users.c.last_login_at < batch.c.last_login_at,
+                )
+            )
+            # Keep updated_at: a login is not a profile change (skips the onupdate default)
+            .values(last_login_at=batch.c.last_login_at, updated_at=users.c.updated_at)
+        )
+        try:
+            async with database.AsyncSessionFactory() as session:
+                await session.execute(statement)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Activity recorder: flush of {len(pending)} entries failed: {e}")
+            for user_id, when in pending.items():  # Keep them for the next flush
+                self._buffer_locally(user_id, when)
+            return 0
+        logger.debug(f"Activity recorder: flushed last_login_at for {len(pending)} users.")
+        return len(pending)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:  # Never let the loop die
+                logger.error(f"Activity recorder: unexpected flush error: {e}", exc_info=True)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="activity-recorder-flush")
+
+    async def stop(self) -> None:
+        """Stops the background task and writes whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+activity_recorder = ActivityRecorder(
+    flush_interval=settings.ACTIVITY_FLUSH_INTERVAL_SECONDS,
+    last_seen_ttl=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60,
+)
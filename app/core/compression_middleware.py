@@ -0,0 +1,103 @@
+# app/core/compression_middleware.py
+from functools import partial
+from typing import Sequence
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.compression import compress_body, negotiate_encoding
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware that brotli/gzip-compresses complete (non-streaming) responses.
+
+    Left untouched:
+    - responses that already carry Content-Encoding (page cache, pre-compressed static files)
+    - streaming responses (first body message has `more_body=True`)
+    - requests under `exclude_paths` (e.g. static files, compressed at build time)
+    - bodies smaller than `minimum_size`, content types outside `content_types`,
+      and responses marked `Cache-Control: no-transform`
+
+    Bodies of `offload_size` bytes or more are compressed in a worker thread so the event
+    loop keeps serving other requests meanwhile.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        minimum_size: int = 500,
+        level: int = 5,
+        offload_size: int = 64 * 1024,
+        content_types: Sequence[str] = ("text/html",),
+        exclude_paths: Sequence[str] = (),
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+        self.offload_size = offload_size
+        self.content_types = tuple(content_types)
+        self.exclude_paths = tuple(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding == "identity":
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message | None = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message  # Held back until we know the body
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+            if passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or not self._should_compress(start_message, body):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            if len(body) >= self.offload_size:
+                compressed = await anyio.to_thread.run_sync(
+                    partial(compress_body, body, encoding, level=self.level)
+                )
+            else:
+                compressed = compress_body(body, encoding, level=self.level)
+
+            headers = MutableHeaders(scope=start_message)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"  # The compressed bytes differ from the original
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _should_compress(self, start_message: Message, body: bytes) -> bool:
+        if len(body) < self.minimum_size:
+            return False
+        headers = Headers(raw=start_message["headers"])
+        if "content-encoding" in headers:
+            return False
+        if "no-transform" in headers.get("cache-control", "").lower():
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return content_type in self.content_types
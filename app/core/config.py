@@ -34,6 +34,17 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Trust user claims inside access tokens (no DB/cache lookup per request); tokens are
+    # revoked through users.token_version, mirrored in Redis (app.core.token_versions)
+    STATELESS_ACCESS_TOKENS: bool = False
+    # Decoded-JWT cache: repeat requests with the same token skip signature verification
+    JWT_CACHE_ENABLED: bool = True
+    JWT_CACHE_MAXSIZE: int = 4096
+
+    # Password hashing worker pool (keeps bcrypt off the event loop)
+    PASSWORD_HASHING_POOL: Literal["thread", "process"] = "thread"
+    PASSWORD_HASHING_MAX_WORKERS: int = 4
+    PASSWORD_HASHING_MAX_QUEUE: int = 32  # Waiting calls beyond this get a 503
 
     # Database (PostgreSQL)
     POSTGRES_SERVER: str = ""
@@ -43,6 +54,16 @@ class Settings(BaseSettings):
     DATABASE_URL: Union[PostgresDsn, str] = ""
     DB_POOL_SIZE: int = 15
     DB_MAX_OVERFLOW: int = 30
+    DB_POOL_TIMEOUT: int = 30  # Seconds to wait for a free connection before erroring
+    DB_POOL_ADVISORY: bool = False  # Recommend pool sizes from observed concurrency (/metrics)
+    WEB_CONCURRENCY: int = 1  # uvicorn workers; used for the pool-size advice
+    # Read replicas: SELECTs are routed to one whose replay lag is within the limit
+    DATABASE_REPLICA_URLS: List[Union[PostgresDsn, str]] = []
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = 10.0
+    DB_READ_YOUR_WRITES_SECONDS: float = 10.0  # Client reads stay on the primary after a write
+    METRICS_PUBLISH_INTERVAL_SECONDS: int = 15  # Workers share snapshots via Redis
+    DB_QUERY_STATS_HEADER: bool = False  # Adds X-DB-Stats (statements/transactions) to responses
 
     # Redis
     REDIS_HOST: str = ""
@@ -56,6 +77,32 @@ class Settings(BaseSettings):
     REDIS_URL: Union[RedisDsn, str] = ""
     REDIS_URL_CELERY: Union[RedisDsn, str] = ""
 
+    # Authenticated-user cache (in-process LRU + Redis)
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_LOCAL_MAXSIZE: int = 1024
+    USER_CACHE_LOCAL_TTL_SECONDS: int = 30  # Keep short: other workers only see Redis deletes
+    USER_CACHE_REDIS_TTL_SECONDS: int = 300
+
+    # Write-behind of users.last_login_at (app.core.activity_recorder)
+    ACTIVITY_FLUSH_INTERVAL_SECONDS: int = 30
+
+    # Rendered-page cache for anonymous visitors (public pages only)
+    PAGE_CACHE_ENABLED: bool = True
+    PAGE_CACHE_MAXSIZE: int = 256
+    PAGE_CACHE_TTL_SECONDS: int = 600
+    PAGE_CACHE_USE_REDIS: bool = False  # Share renders between workers via redis_pool
+    PAGE_CACHE_PURGE_ON_STARTUP: bool = True  # Drop renders from the previous deploy
+
+    # Rate limiting of auth endpoints (app.utils.rate_limiter, shared through Redis)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_WINDOW_SECONDS: int = 60
+    RATE_LIMIT_ACCOUNT_WINDOW_SECONDS: int = 900
+    RATE_LIMIT_LOGIN_PER_IP: int = 20
+    RATE_LIMIT_LOGIN_PER_ACCOUNT: int = 10  # Per RATE_LIMIT_ACCOUNT_WINDOW_SECONDS
+    RATE_LIMIT_REGISTER_PER_IP: int = 5
+    RATE_LIMIT_REFRESH_PER_IP: int = 30
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False  # Only behind a proxy that sets the header
+
     # Celery
     CELERY_BROKER_URL: Union[RedisDsn, str] = ""
     CELERY_RESULT_BACKEND_URL: Union[RedisDsn, str] = ""
@@ -63,6 +110,27 @@ class Settings(BaseSettings):
     # Static and Templates
     STATIC_DIR: str = os.path.join(APP_DIR, "static")
     TEMPLATES_DIR: str = os.path.join(APP_DIR, "web", "templates")
+    TEMPLATE_PRECOMPILE_ON_STARTUP: bool = True
+    TEMPLATE_BYTECODE_CACHE_DIR: str | None = None  # e.g. "/tmp/ashoka-jinja-cache"
+    TEMPLATE_STREAMING_ENABLED: bool = True  # Stream pages, flushing <head> first
+    TEMPLATE_STREAM_FLUSH_SIZE: int = 8192  # Characters buffered between flushes after <head>
+    STATIC_USE_MANIFEST: bool = True  # Use fingerprinted paths from static/dist/manifest.json
+    STATIC_SERVE_PRECOMPRESSED: bool = True  # Serve .br/.gz siblings written by the build
+    IMAGE_DERIVATIVE_WIDTHS: List[int] = [96, 192, 320, 480, 768, 1024, 1536]
+
+    # Response compression for dynamic responses (app.core.compression_middleware)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 500  # Bytes; smaller bodies are sent as-is
+    COMPRESSION_LEVEL: int = 5  # gzip scale 1-9, mapped onto brotli quality
+    COMPRESSION_OFFLOAD_SIZE: int = 65536  # Bodies this large are compressed in a thread
+    COMPRESSION_CONTENT_TYPES: List[str] = [
+        "text/html",
+        "text/plain",
+        "text/css",
+        "application/json",
+        "application/javascript",
+        "image/svg+xml",
+    ]
 
     BACKEND_CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:8000"]
 
@@ -73,6 +141,16 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str | None = None
     EMAILS_FROM_EMAIL: str | None = "noreply@ashokafoundation.org"
     EMAILS_FROM_NAME: str | None = None
+    SMTP_TIMEOUT_SECONDS: float = 10
+    # Native asyncio SMTP client (app.services.async_smtp); False sends via smtplib in threads
+    SMTP_ASYNC_TRANSPORT: bool = True
+    # Pooled SMTP connections (app.services.smtp_pool), per process
+    SMTP_POOL_SIZE: int = 4
+    SMTP_POOL_MAX_MESSAGES_PER_CONNECTION: int = 100
+    SMTP_POOL_IDLE_TIMEOUT_SECONDS: float = 240  # Below typical server idle cut-offs (~5 min)
+    SMTP_POOL_NOOP_AFTER_SECONDS: float = 15  # Health-check connections idle this long
+    EMAIL_BULK_CHUNK_SIZE: int = 50  # Recipients sent per SMTP session by send_bulk_email
+    EMAIL_BULK_TASK_SIZE: int = 1000  # Recipients per send_bulk_email task (queue_bulk_email)
 
     ENVIRONMENT: str = "development"
 
@@ -0,0 +1,126 @@
+# app/core/hashing_pool.py
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import bcrypt
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Top-level functions so they can be pickled when a process pool is used.
+def bcrypt_verify(plain_password: bytes, hashed_password: bytes) -> bool:
+    return bcrypt.checkpw(password=plain_password, hashed_password=hashed_password)
+
+
+def bcrypt_hash(password: bytes) -> bytes:
+    return bcrypt.hashpw(password=password, salt=bcrypt.gensalt())
+
+
+class HashingPool:
+    """
+    Bounded worker pool for CPU-heavy password hashing.
+
+    - At most `max_workers` hashes run at once (the executor size).
+    - At most `max_queue` further calls may wait for a free worker. Anything beyond
+      that is rejected with 503 so a login burst cannot pile up behind the pool.
+    - `metrics()` reports queue depth, rejections and timings.
+    """
+
+    def __init__(self, *, mode: str, max_workers: int, max_queue: int):
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0  # Running + waiting
+        self._lock = threading.Lock()  # Slots are released from executor threads
+        # Counters
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.peak_queue_depth = 0
+        self.total_run_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="pwhash"
+                )
+        return self._executor
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._in_flight - self.max_workers)
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                saturated = self._in_flight
+            else:
+                saturated = None
+                self._in_flight += 1
+                self.submitted += 1
+                self.peak_queue_depth = max(self.peak_queue_depth, self.queue_depth)
+        if saturated is not None:
+            logger.warning(
+                f"Password hashing pool saturated ({saturated} in flight). Rejecting request."
+            )
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="The server is busy. Please try again in a moment.",
+                headers={"Retry-After": "1"},
+            )
+
+        started = time.perf_counter()
+
+        def release(_: Future) -> None:
+            # The slot is held until the job itself finishes: a cancelled caller (e.g. the
+            # client disconnected) does not stop a hash that is already running.
+            with self._lock:
+                self._in_flight -= 1
+                self.completed += 1
+                self.total_run_seconds += time.perf_counter() - started
+
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            release(None)
+            raise
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "peak_queue_depth": self.peak_queue_depth,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_seconds": (self.total_run_seconds / self.completed) if self.completed else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hashing_pool = HashingPool(
+    mode=settings.PASSWORD_HASHING_POOL,
+    max_workers=settings.PASSWORD_HASHING_MAX_WORKERS,
+    max_queue=settings.PASSWORD_HASHING_MAX_QUEUE,
+)
@@ -0,0 +1,58 @@
+# app/core/jwt_cache.py
+import hashlib
+import time
+from typing import Any
+
+from jose import jwt
+
+from app.core.config import settings
+from app.utils.ttl_cache import TTLLRUCache
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of recently verified JWTs: SHA-256 digest of the token -> decoded payload.
+
+    A session sends the same access token with every request, so only the first request
+    pays for HMAC verification and JSON parsing. Each entry expires together with the
+    token's own `exp`, so an expired token is never served from the cache. Only successful
+    decodes are cached; invalid tokens always go through `jwt.decode` and raise.
+    """
+
+    def __init__(self, maxsize: int, *, enabled: bool = True):
+        self.enabled = enabled
+        self._cache: TTLLRUCache[dict[str, Any]] = TTLLRUCache(maxsize, 0)
+
+    def decode(self, token: str) -> dict[str, Any]:
+        """Drop-in for `jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])`."""
+        if not self.enabled:
+            return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        payload = self._cache.get(digest)
+        if payload is not None:
+            return dict(payload)  # Copy: callers must not alter the cached entry
+
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        expires_in = payload.get("exp", 0) - time.time()
+        if expires_in > 0:
+            self._cache.set(digest, dict(payload), ttl=expires_in)
+        return payload
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def metrics(self) -> dict[str, Any]:
+        lookups = self._cache.hits + self._cache.misses
+        return {
+            "size": len(self._cache),
+            "maxsize": self._cache.maxsize,
+            "hits": self._cache.hits,
+            "misses": self._cache.misses,
+            "hit_rate": round(self._cache.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+verified_tokens = VerifiedTokenCache(
+    settings.JWT_CACHE_MAXSIZE, enabled=settings.JWT_CACHE_ENABLED
+)
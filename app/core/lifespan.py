@@ -1,6 +1,16 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.db.database import async_engine, redis_pool
+from app.db.database import async_engine, redis_pool, replica_router
+from app.core.activity_recorder import activity_recorder
+from app.core.hashing_pool import hashing_pool
+from app.core.metrics import metrics_publisher
+from app.core.page_cache import page_cache
+from app.core.config import settings
+from app.core.templating import precompile_templates
+from app.services.async_smtp import async_smtp_pool
+from app.services.email_templates import precompile_email_templates
+from app.services.smtp_pool import smtp_pool
 import redis.asyncio
 
 # from app.tasks.celery_app import celery_app # If you want to control Celery from here (optional)
@@ -18,6 +28,7 @@ async def lifespan(app: FastAPI):
         async with async_engine.connect() as conn:
             await conn.run_sync(lambda sync_conn: None)  # Minimal check
         logger.info("Database connection successful.")
+        replica_router.start()  # No-op without DATABASE_REPLICA_URLS
 
         # Test Redis connection
         redis_client = redis.asyncio.Redis(connection_pool=redis_pool)
@@ -25,6 +36,16 @@ async def lifespan(app: FastAPI):
         logger.info("Redis connection successful.")
         await redis_client.close()
 
+        if settings.TEMPLATE_PRECOMPILE_ON_STARTUP:
+            precompile_templates()
+            precompile_email_templates()
+
+        if settings.PAGE_CACHE_PURGE_ON_STARTUP:
+            await page_cache.purge()
+
+        activity_recorder.start()
+        metrics_publisher.start()
+
     except Exception as e:
         logger.error(f"Error during startup: {e}")
         # Depending on severity, you might want to raise the error to stop FastAPI
@@ -35,6 +56,12 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("Application shutdown: Disposing database engine and Redis pool...")
+    await metrics_publisher.stop()
+    await activity_recorder.stop()  # Final flush needs both the engine and Redis
     await async_engine.dispose()
+    await replica_router.dispose()
     await redis_pool.disconnect()
+    hashing_pool.shutdown()
+    await async_smtp_pool.close()
+    await asyncio.to_thread(smtp_pool.close)
     logger.info("Resources disposed.")
@@ -0,0 +1,104 @@
+# app/core/metrics.py
+import asyncio
+import json
+import logging
+import os
+import socket
+from typing import Any, Optional
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.core.hashing_pool import hashing_pool
+from app.core.jwt_cache import verified_tokens
+from app.db.database import redis_pool, replica_router
+from app.db.pool_metrics import pool_metrics
+
+logger = logging.getLogger(__name__)
+
+WORKER_KEY_PREFIX = "metrics:worker:"
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def collect_metrics() -> dict[str, Any]:
+    """Snapshot of this worker: DB pools, replica lag, hashing pool and JWT cache."""
+    db_pools = {name: metrics.snapshot() for name, metrics in pool_metrics.items()}
+    if settings.DB_POOL_ADVISORY:
+        for name, metrics in pool_metrics.items():
+            db_pools[name]["advice"] = metrics.recommend(settings.WEB_CONCURRENCY)
+    return {
+        "worker": worker_id(),
+        "db_pools": db_pools,
+        "replica_lag_seconds": {
+            engine.url.host: replica_router.lag.get(index)
+            for index, engine in enumerate(replica_router.engines)
+        },
+        "hashing_pool": hashing_pool.metrics(),
+        "jwt_cache": verified_tokens.metrics(),
+    }
+
+
+class MetricsPublisher:
+    """
+    Every worker periodically writes its snapshot to Redis (expiring key), so the metrics
+    endpoint can report on all uvicorn workers, not just the one serving the request.
+    """
+
+    def __init__(self, *, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def _redis(self) -> aioredis.Redis:
+        return aioredis.Redis(connection_pool=redis_pool)
+
+    async def publish(self) -> None:
+        try:
+            await self._redis().set(
+                f"{WORKER_KEY_PREFIX}{worker_id()}",
+                json.dumps(collect_metrics()),
+                ex=int(self.interval * 3),
+            )
+        except Exception as e:
+            logger.warning(f"Metrics: could not publish worker snapshot: {e}")
+
+    async def read_all(self) -> list[dict[str, Any]]:
+        """Latest snapshot of every live worker; this worker's is always fresh."""
+        snapshots = {worker_id(): collect_metrics()}
+        try:
+            client = self._redis()
+            async for key in client.scan_iter(match=f"{WORKER_KEY_PREFIX}*", count=100):
+                raw = await client.get(key)
+                worker = key[len(WORKER_KEY_PREFIX) :]
+                if raw and worker not in snapshots:
+                    snapshots[worker] = json.loads(raw)
+        except Exception as e:
+            logger.warning(f"Metrics: could not read worker snapshots: {e}")
+        return list(snapshots.values())
+
+    async def _run(self) -> None:
+        while True:
+            await self.publish()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="metrics-publisher")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if settings.DB_POOL_ADVISORY:
+            for name, metrics in pool_metrics.items():
+                advice = metrics.recommend(settings.WEB_CONCURRENCY)
+                logger.info(f"DB pool '{name}' sizing advice: {advice}")
+
+
+metrics_publisher = MetricsPublisher(interval=settings.METRICS_PUBLISH_INTERVAL_SECONDS)
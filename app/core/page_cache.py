@@ -0,0 +1,180 @@
+# app/core/page_cache.py
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+import redis.asyncio as aioredis
+from fastapi import Request
+from fastapi.responses import HTMLResponse, Response
+
+from app.core.config import settings
+from app.core.templating import FLASH_SESSION_KEYS, stream_template, templates
+from app.db.database import redis_pool
+from app.utils.compression import compress_body, negotiate_encoding
+from app.utils.ttl_cache import TTLLRUCache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedPage:
+    body: bytes
+    etag: str
+    encoding: str  # "br", "gzip" or "identity"
+
+
+class PageCache:
+    """
+    Cache of rendered HTML for public pages, for anonymous visitors only.
+
+    Key: template name + user state + negotiated encoding + URL scheme. Templates build
+    absolute URLs with `request.url_for`, so the host is part of the output: only requests
+    for the configured host (`canonical_base`) are cached, any other Host header is
+    rendered uncached and cannot add entries.
+    Bodies are stored already compressed, together with a per-encoding ETag, so a hit
+    costs no rendering and no compression. The optional Redis tier lets workers share renders.
+
+    Requests that carry an auth cookie or a pending flash message are never cached:
+    base.html pops flash messages from the session, so that output is per-visitor.
+    """
+
+    def __init__(
+        self,
+        *,
+        maxsize: int,
+        ttl: int,
+        use_redis: bool,
+        canonical_base: str,
+        key_prefix: str = "page_cache:",
+        enabled: bool = True,
+    ):
+        self.canonical_host = urlsplit(canonical_base).netloc.lower()
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self.key_prefix = key_prefix
+        self.enabled = enabled
+        self._local: TTLLRUCache[CachedPage] = TTLLRUCache(maxsize, ttl)
+
+    def _redis(self) -> aioredis.Redis:
+        return aioredis.Redis(connection_pool=redis_pool)
+
+    def is_cacheable(self, request: Request, current_user: Any) -> bool:
+        if not self.enabled or request.method != "GET" or current_user is not None:
+            return False
+        if request.cookies.get("access_token"):
+            return False
+        if request.url.netloc.lower() != self.canonical_host:
+            return False
+        session = request.scope.get("session") or {}
+        return not any(key in session for key in FLASH_SESSION_KEYS)
+
+    def make_key(
+        self, request: Request, template_name: str, user_state: str, encoding: str
+    ) -> str:
+        return f"{self.key_prefix}{template_name}|{user_state}|{encoding}|{request.url.scheme}"
+
+    async def _get(self, key: str) -> Optional[CachedPage]:
+        page = self._local.get(key)
+        if page is not None or not self.use_redis:
+            return page
+        try:
+            raw = await self._redis().get(key)
+        except Exception as e:
+            logger.warning(f"Page cache: Redis read failed for {key}: {e}")
+            return None
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        page = CachedPage(
+            body=base64.b64decode(data["body"]), etag=data["etag"], encoding=data["encoding"]
+        )
+        self._local.set(key, page)
+        return page
+
+    async def _set(self, key: str, page: CachedPage) -> None:
+        self._local.set(key, page)
+        if not self.use_redis:
+            return
+        # redis_pool decodes responses as text, so the binary body travels as base64
+        data = {
+            "body": base64.b64encode(page.body).decode("ascii"),
+            "etag": page.etag,
+            "encoding": page.encoding,
+        }
+        try:
+            await self._redis().set(key, json.dumps(data), ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Page cache: Redis write failed for {key}: {e}")
+
+    @staticmethod
+    def _build_response(request: Request, page: CachedPage) -> Response:
+        headers = {
+            "ETag": page.etag,
+            "Vary": "Accept-Encoding, Cookie",
+            "Cache-Control": "no-cache",  # Browsers may keep it but must revalidate via ETag
+        }
+        if page.encoding != "identity":
+            headers["Content-Encoding"] = page.encoding
+        if_none_match = request.headers.get("if-none-match", "")
+        if page.etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+        return HTMLResponse(content=page.body, headers=headers)
+
+    async def render(
+        self,
+        request: Request,
+        template_name: str,
+        context: dict[str, Any],
+        *,
+        current_user: Any = None,
+    ) -> Response:
+        """Renders `template_name`, serving and storing anonymous renders through the cache."""
+        if not self.is_cacheable(request, current_user):
+            return await stream_template(template_name, context)
+
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+        key = self.make_key(request, template_name, "anon", encoding)
+        page = await self._get(key)
+        if page is None:
+            template = templates.get_template(template_name)
+            content = (await template.render_async(context)).encode("utf-8")
+            # One representation per encoding, so each gets its own strong validator
+            etag = f'"{hashlib.sha1(content).hexdigest()}-{encoding}"'
+            body = await asyncio.to_thread(compress_body, content, encoding)
+            page = CachedPage(body=body, etag=etag, encoding=encoding)
+            await self._set(key, page)
+        return self._build_response(request, page)
+
+    async def purge(self) -> int:
+        """Drops every cached page, locally and in Redis. Returns the Redis keys removed."""
+        self._local.clear()
+        if not self.use_redis:
+            return 0
+        removed = 0
+        try:
+            client = self._redis()
+            async for key in client.scan_iter(match=f"{self.key_prefix}*", count=500):
+                removed += await client.delete(key)
+        except Exception as e:
+            logger.warning(f"Page cache: Redis purge failed: {e}")
+        logger.info(f"Page cache purged ({removed} shared entries removed).")
+        return removed
+
+
+page_cache = PageCache(
+    maxsize=settings.PAGE_CACHE_MAXSIZE,
+    ttl=settings.PAGE_CACHE_TTL_SECONDS,
+    use_redis=settings.PAGE_CACHE_USE_REDIS,
+    canonical_base=settings.CANONICAL_URL_BASE,
+    enabled=settings.PAGE_CACHE_ENABLED,
+)
+
+
+if __name__ == "__main__":
+    # Deploy hook: `python -m app.core.page_cache` clears stale renders from Redis
+    asyncio.run(page_cache.purge())
@@ -0,0 +1,205 @@
+# app/core/refresh_tokens.py
+import hashlib
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.core.token_versions import token_versions
+from app.core.user_cache import serialize_user
+from app.db.database import redis_pool
+from app.db.models.user_model import User
+
+logger = logging.getLogger(__name__)
+
+# Rotation outcomes
+ROTATED = "rotated"
+REUSED = "reused"  # A superseded token was presented: the family has been revoked
+REVOKED = "revoked"  # Family unknown: revoked, expired or never recorded
+UNAVAILABLE = "unavailable"  # Redis error; the caller decides how to proceed
+
+# KEYS[1] = family hash, KEYS[2] = the user's token version (app.core.token_versions),
+# KEYS[3] = the user's family index
+# ARGV = presented jti, new jti, user_id, family TTL (ms), family id
+# The index is kept alive along with the family, and a family missing from it (e.g. the
+# index expired) is revoked: revoke_user can only reach the families the index lists.
+# Returns {outcome, user_json, token_version or false}.
+ROTATE_LUA = """
+local family = redis.call('HMGET', KEYS[1], 'jti', 'user_id', 'user')
+if not family[1] then
+    return {'revoked', false, false}
+end
+if redis.call('SISMEMBER', KEYS[3], ARGV[5]) == 0 then
+    redis.call('DEL', KEYS[1])
+    return {'revoked', false, false}
+end
+if family[1] ~= ARGV[1] or family[2] ~= ARGV[3] then
+    redis.call('DEL', KEYS[1])
+    return {'reused', false, false}
+end
+redis.call('HSET', KEYS[1], 'jti', ARGV[2])
+redis.call('PEXPIRE', KEYS[1], ARGV[4])
+redis.call('PEXPIRE', KEYS[3], ARGV[4])
+return {'rotated', family[3], redis.call('GET', KEYS[2])}
+"""
+
+# KEYS = family hashes of one user; ARGV[1] = user JSON. Skips families that expired
+# meanwhile, so they are not recreated without a TTL.
+UPDATE_USER_LUA = """
+for _, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        redis.call('HSET', key, 'user', ARGV[1])
+    end
+end
+return 0
+"""
+
+
+@dataclass
+class RotationResult:
+    outcome: str
+    user_data: Optional[dict[str, Any]] = None
+
+
+class RefreshTokenStore:
+    """
+    Server-side record of refresh-token families in Redis.
+
+    A family starts at login and follows one chain of refresh tokens. Each refresh token
+    carries its family id (`fid`) and a one-time id (`jti`); the family hash stores the
+    only `jti` that may still be used, together with a snapshot of the user. Rotation is a
+    single atomic Lua call: it swaps in the new `jti` and returns the user snapshot, so
+    refreshing needs no Postgres. A snapshot whose token version is behind the user's
+    current one missed a revocation, and its family is dropped.
+
+    Presenting an already-rotated token means it was copied: the whole family is deleted
+    and both holders have to log in again. `revoke_user` drops all families of a user
+    (password change, deactivation). Tokens without a family are single-use as well
+    (`consume_untracked`).
+    """
+
+    def __init__(self, *, ttl_seconds: int, key_prefix: str = "refresh_family:"):
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+        self._rotate_script = None
+        self._update_script = None
+
+    def _family_key(self, family_id: str) -> str:
+        return f"{self.key_prefix}{family_id}"
+
+    def _user_families_key(self, user_id: int) -> str:
+        return f"{self.key_prefix}user:{user_id}"
+
+    def _consumed_key(self, token: str) -> str:
+        return f"{self.key_prefix}consumed:{hashlib.sha256(token.encode()).hexdigest()}"
+
+    def _redis(self) -> aioredis.Redis:
+        return aioredis.Redis(connection_pool=redis_pool)
+
+    async def start_family(self, user: User) -> Optional[dict[str, str]]:
+        """Records a new family; returns the `fid`/`jti` claims, or None if Redis is down."""
+        family_id, jti = uuid.uuid4().hex, uuid.uuid4().hex
+        family_key = self._family_key(family_id)
+        user_families_key = self._user_families_key(user.id)
+        try:
+            async with self._redis().pipeline(transaction=True) as pipe:
+                pipe.hset(
+                    family_key,
+                    mapping={
+                        "jti": jti,
+                        "user_id": str(user.id),
+                        "user": json.dumps(serialize_user(user)),
+                    },
+                )
+                pipe.expire(family_key, self.ttl_seconds)
+                pipe.sadd(user_families_key, family_id)
+                pipe.expire(user_families_key, self.ttl_seconds)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Refresh tokens: could not start a family for user {user.id}: {e}")
+            return None
+        return {"fid": family_id, "jti": jti}
+
+    async def rotate(self, family_id: str, jti: str, new_jti: str, user_id: int) -> RotationResult:
+        """Consumes `jti` and makes `new_jti` the family's next valid token."""
+        try:
+            if self._rotate_script is None:
+                self._rotate_script = self._redis().register_script(ROTATE_LUA)
+            outcome, user_json, token_version = await self._rotate_script(
+                keys=[
+                    self._family_key(family_id),
+                    token_versions.redis_key(user_id),
+                    self._user_families_key(user_id),
+                ],
+                args=[jti, new_jti, str(user_id), self.ttl_seconds * 1000, family_id],
+            )
+        except Exception as e:
+            logger.warning(f"Refresh tokens: rotation failed for family {family_id}: {e}")
+            return RotationResult(outcome=UNAVAILABLE)
+
+        if outcome == REUSED:
+            logger.warning(
+                f"Refresh token reuse detected for user {user_id}; family {family_id} revoked."
+            )
+        if outcome != ROTATED:
+            return RotationResult(outcome=outcome)
+        user_data = json.loads(user_json)
+        if token_version is not None and int(token_version) != user_data.get("token_version"):
+            logger.warning(f"Refresh tokens: family {family_id} outlived a revocation; revoked.")
+            await self.revoke_family(family_id)
+            return RotationResult(outcome=REVOKED)
+        return RotationResult(outcome=ROTATED, user_data=user_data)
+
+    async def consume_untracked(self, token: str, expires_at: int) -> str:
+        """
+        Marks a refresh token without `fid`/`jti` (issued while Redis was down) as used,
+        until it expires. Returns ROTATED the first time, REUSED on any replay, and
+        UNAVAILABLE when Redis cannot record it.
+        """
+        ttl = max(1, int(expires_at - time.time()))
+        try:
+            first_use = await self._redis().set(self._consumed_key(token), 1, nx=True, ex=ttl)
+        except Exception as e:
+            logger.warning(f"Refresh tokens: could not record an untracked token: {e}")
+            return UNAVAILABLE
+        return ROTATED if first_use else REUSED
+
+    async def revoke_family(self, family_id: str) -> None:
+        try:
+            await self._redis().delete(self._family_key(family_id))
+        except Exception as e:
+            logger.error(f"Refresh tokens: could not revoke family {family_id}: {e}")
+
+    async def revoke_user(self, user_id: int) -> None:
+        """Revokes every refresh-token family of the user."""
+        user_families_key = self._user_families_key(user_id)
+        try:
+            client = self._redis()
+            family_ids = await client.smembers(user_families_key)
+            await client.delete(user_families_key, *(self._family_key(fid) for fid in family_ids))
+        except Exception as e:
+            logger.error(f"Refresh tokens: could not revoke families of user {user_id}: {e}")
+
+    async def update_user(self, user: User) -> None:
+        """Refreshes the user snapshot kept in the user's live families."""
+        try:
+            client = self._redis()
+            family_ids = await client.smembers(self._user_families_key(user.id))
+            if not family_ids:
+                return
+            if self._update_script is None:
+                self._update_script = client.register_script(UPDATE_USER_LUA)
+            await self._update_script(
+                keys=[self._family_key(fid) for fid in family_ids],
+                args=[json.dumps(serialize_user(user))],
+            )
+        except Exception as e:
+            logger.warning(f"Refresh tokens: could not update families of user {user.id}: {e}")
+
+
+refresh_tokens = RefreshTokenStore(ttl_seconds=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60)
@@ -0,0 +1,73 @@
+# app/core/request_context.py
+import logging
+from typing import Sequence
+
+from fastapi import HTTPException, status
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.security import (
+    CURRENT_USER_ERROR_KEY,
+    CURRENT_USER_RESOLVED_KEY,
+    load_user_for_access_token,
+)
+from app.db.database import QueryStats, query_stats
+
+logger = logging.getLogger(__name__)
+
+
+class RequestContextMiddleware:
+    """
+    Pure ASGI middleware that resolves the user from the `access_token` cookie once per
+    request and stores it in scope["state"], i.e. `request.state.current_user`.
+
+    An invalid token is not an error here: the HTTPException is kept in the state and
+    re-raised by `get_current_user_from_cookie_web` only for routes that depend on it.
+    The same goes for a failed lookup (DB/Redis down), which is kept as a 503.
+    Paths in `skip_prefixes` (static files) are passed straight through.
+
+    It also counts the SQL statements, transactions and commits of the request
+    (`request.state.db_stats`); with DB_QUERY_STATS_HEADER they are sent as `X-DB-Stats`.
+    """
+
+    def __init__(self, app: ASGIApp, *, skip_prefixes: Sequence[str] = ("/static",)):
+        self.app = app
+        self.skip_prefixes = tuple(skip_prefixes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.skip_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        stats_token = query_stats.set(stats)
+        state = scope.setdefault("state", {})
+        state["db_stats"] = stats
+        state["current_user"] = None
+        token = HTTPConnection(scope).cookies.get("access_token")
+        if token:
+            try:
+                state["current_user"] = await load_user_for_access_token(token)
+            except HTTPException as exc:
+                state[CURRENT_USER_ERROR_KEY] = exc
+            except Exception as e:  # DB/Redis trouble must not break public pages
+                logger.error(f"Could not resolve the user from the access token: {e}")
+                state[CURRENT_USER_ERROR_KEY] = HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Could not verify your session. Please try again shortly.",
+                    headers={"Retry-After": "5"},
+                )
+        state[CURRENT_USER_RESOLVED_KEY] = True
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and settings.DB_QUERY_STATS_HEADER:
+                MutableHeaders(scope=message)["X-DB-Stats"] = stats.as_header()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            query_stats.reset(stats_token)
+            logger.debug(f"{scope['method']} {scope['path']}: {stats.as_header()}")
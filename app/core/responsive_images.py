@@ -0,0 +1,167 @@
+# app/core/responsive_images.py
+import json
+import logging
+import os
+import shutil
+from functools import lru_cache
+from typing import Any
+
+from jinja2 import pass_context
+from markupsafe import Markup, escape
+
+from app.core.config import settings
+from app.core.static_assets import static_url
+
+logger = logging.getLogger(__name__)
+
+# Derivatives are written next to the sources so the static build (app.core.static_assets)
+# fingerprints them like any other file. Run this step first, then the static build.
+RESPONSIVE_DIRNAME = "responsive"
+MANIFEST_FILENAME = "manifest.json"
+SOURCE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+# Modern formats first: the browser takes the first <source> it supports.
+MODERN_FORMATS = (("avif", "image/avif", 50), ("webp", "image/webp", 80))
+FALLBACK_JPEG_QUALITY = 80
+
+
+def _responsive_dir(static_dir: str) -> str:
+    return os.path.join(static_dir, "img", RESPONSIVE_DIRNAME)
+
+
+def _target_widths(original_width: int) -> list[int]:
+    widths = [w for w in settings.IMAGE_DERIVATIVE_WIDTHS if w < original_width]
+    widths.append(min(original_width, max(settings.IMAGE_DERIVATIVE_WIDTHS)))
+    return sorted(set(widths))
+
+
+def build_responsive_images(static_dir: str = settings.STATIC_DIR) -> dict[str, Any]:
+    """
+    Offline step: writes resized AVIF/WebP/fallback derivatives of every image in
+    `static/img` to `static/img/responsive/` and records them in a manifest.
+    The fallback is JPEG, or PNG when a PNG source has transparency (logos).
+    Requires Pillow (build-time only): `python -m app.core.responsive_images`.
+    """
+    from PIL import Image, features  # Build-time dependency only
+
+    source_dir = os.path.join(static_dir, "img")
+    output_dir = _responsive_dir(static_dir)
+    if os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir)
+
+    modern_formats = [fmt for fmt in MODERN_FORMATS if features.check(fmt[0])]
+    skipped = {fmt[0] for fmt in MODERN_FORMATS} - {fmt[0] for fmt in modern_formats}
+    if skipped:
+        logger.warning(f"Pillow lacks support for {sorted(skipped)}; those variants are skipped.")
+
+    manifest: dict[str, Any] = {}
+    for filename in sorted(os.listdir(source_dir)):
+        name, ext = os.path.splitext(filename)
+        if ext.lower() not in SOURCE_EXTENSIONS:
+            continue
+
+        with Image.open(os.path.join(source_dir, filename)) as image:
+            image.load()
+            has_alpha = image.mode in ("RGBA", "LA", "P") and ext.lower() == ".png"
+            fallback_ext = "png" if has_alpha else "jpg"
+            original_width, original_height = image.size
+            entry: dict[str, Any] = {
+                "width": original_width,
+                "height": original_height,
+                "sources": {mime: [] for _ext, mime, _q in modern_formats},
+                "fallback": [],
+            }
+
+            for width in _target_widths(original_width):
+                height = round(original_height * width / original_width)
+                resized = image.resize((width, height), Image.Resampling.LANCZOS)
+                base = f"img/{RESPONSIVE_DIRNAME}/{name}-{width}"
+
+                for fmt_ext, mime, quality in modern_formats:
+                    path = f"{base}.{fmt_ext}"
+                    resized.save(os.path.join(static_dir, path), quality=quality)
+                    entry["sources"][mime].append({"path": path, "width": width})
+
+                path = f"{base}.{fallback_ext}"
+                if has_alpha:
+                    resized.save(os.path.join(static_dir, path), optimize=True)
+                else:
+                    resized.convert("RGB").save(
+                        os.path.join(static_dir, path),
+                        quality=FALLBACK_JPEG_QUALITY,
+                        optimize=True,
+                        progressive=True,
+                    )
+                entry["fallback"].append({"path": path, "width": width})
+
+        manifest[f"img/{filename}"] = entry
+        logger.info(f"Built {len(entry['fallback'])} widths for img/{filename}.")
+
+    with open(os.path.join(output_dir, MANIFEST_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+@lru_cache(maxsize=1)
+def load_image_manifest() -> dict[str, Any]:
+    try:
+        with open(
+            os.path.join(_responsive_dir(settings.STATIC_DIR), MANIFEST_FILENAME), encoding="utf-8"
+        ) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        logger.info("No responsive image manifest found; serving original images.")
+        return {}
+
+
+def _html_attrs(attrs: dict[str, Any]) -> str:
+    return " ".join(
+        f'{key.rstrip("_").replace("_", "-")}="{escape(value)}"'
+        for key, value in attrs.items()
+        if value is not None
+    )
+
+
+@pass_context
+def responsive_image(
+    context: Any, path: str, alt: str, sizes: str = "100vw", **attrs: Any
+) -> Markup:
+    """
+    Jinja global: `{{ responsive_image('img/logo.png', 'Logo', sizes='90px', height=45) }}`.
+    Emits a <picture> with AVIF/WebP sources and a fallback <img srcset>, or a plain
+    <img> when no derivatives were built. Extra keyword arguments become <img>
+    attributes (`class_` -> `class`, `data_x` -> `data-x`).
+    """
+    attrs.setdefault("loading", "lazy")
+    attrs.setdefault("decoding", "async")
+    entry = load_image_manifest().get(path)
+    if entry is None:
+        return Markup(
+            f'<img src="{static_url(context, path)}" {_html_attrs({"alt": alt, **attrs})}>'
+        )
+
+    def srcset(variants: list[dict[str, Any]]) -> str:
+        return ", ".join(f"{static_url(context, v['path'])} {v['width']}w" for v in variants)
+
+    if "width" not in attrs and "height" not in attrs:
+        # Intrinsic size lets the browser reserve space before the image arrives
+        attrs["width"], attrs["height"] = entry["width"], entry["height"]
+
+    sources = "".join(
+        f'<source type="{mime}" srcset="{srcset(variants)}" sizes="{escape(sizes)}">'
+        for mime, variants in entry["sources"].items()
+        if variants
+    )
+    img_attrs = {
+        "src": static_url(context, entry["fallback"][-1]["path"]),
+        "srcset": srcset(entry["fallback"]),
+        "sizes": sizes,
+        "alt": alt,
+        **attrs,
+    }
+    return Markup(f"<picture>{sources}<img {_html_attrs(img_attrs)}></picture>")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    build_responsive_images()
@@ -5,13 +5,23 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, Request, Response
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
 from app.core.config import settings
 from app.db import database, schemas as db_schemas  # renamed to avoid conflict
 from app.db.models.user_model import User as UserModel  # renamed to avoid conflict
 from app.repositories.user_repository import UserRepository
+from app.core.user_cache import user_cache, user_from_cache
+from app.core.token_versions import token_versions
+from app.core.refresh_tokens import refresh_tokens
+from app.core.jwt_cache import verified_tokens
+from app.core.hashing_pool import hashing_pool, bcrypt_hash, bcrypt_verify
 import bcrypt
 
+# Keys in scope["state"] written by app.core.request_context.RequestContextMiddleware
+CURRENT_USER_RESOLVED_KEY = "current_user_resolved"
+CURRENT_USER_ERROR_KEY = "current_user_error"
+
 # from app.repositories.user_repository import user_repository # Circular dependency risk, get user directly here
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -33,6 +43,19 @@ def get_password_hash(password: str) -> str:
     return hashed_password
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Non-blocking verify_password. Raises 503 when the hashing pool is saturated."""
+    return await hashing_pool.run(
+        bcrypt_verify, plain_password.encode("utf-8"), hashed_password.encode("utf-8")
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Non-blocking get_password_hash. Raises 503 when the hashing pool is saturated."""
+    hashed_password = await hashing_pool.run(bcrypt_hash, password.encode("utf-8"))
+    return hashed_password.decode("utf-8")
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -46,6 +69,34 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+# User columns copied into stateless access tokens: exactly what the templates read
+STATELESS_USER_CLAIMS = ("full_name", "is_active", "is_superuser")
+
+
+async def issue_access_token(user: UserModel) -> str:
+    """
+    Access token for `user`. With STATELESS_ACCESS_TOKENS it also carries the user claims
+    and the user's token version (`tv`), so requests can be served without a user lookup.
+    """
+    data: dict[str, Any] = {"sub": user.username, "user_id": user.id}
+    # Snapshots cached before users.token_version existed have no version: regular token
+    if settings.STATELESS_ACCESS_TOKENS and user.token_version is not None:
+        data["tv"] = user.token_version
+        data.update({claim: getattr(user, claim) for claim in STATELESS_USER_CLAIMS})
+    return create_access_token(data=data)
+
+
+def user_from_claims(payload: dict[str, Any]) -> UserModel:
+    """Detached User built from a stateless token; only the claimed columns are loaded."""
+    user = UserModel(
+        id=payload["user_id"],
+        username=payload["sub"],
+        **{claim: payload.get(claim) for claim in STATELESS_USER_CLAIMS},
+    )
+    make_transient_to_detached(user)
+    return user
+
+
 def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -57,6 +108,15 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None)
     return encoded_jwt
 
 
+async def issue_refresh_token(user: UserModel) -> str:
+    """Refresh token starting a new rotation family (app.core.refresh_tokens)."""
+    data: dict[str, Any] = {"sub": user.username, "user_id": user.id}
+    family_claims = await refresh_tokens.start_family(user)
+    if family_claims is not None:  # Without Redis, issue an untracked token
+        data.update(family_claims)
+    return create_refresh_token(data=data)
+
+
 async def get_user_by_id_for_auth(db: AsyncSession, user_id: int) -> Optional[UserModel]:
     # Directly query user to avoid circular imports with repository/service
     from sqlalchemy.future import select  # For SQLAlchemy 2.0 style
@@ -74,20 +134,11 @@ async def get_user_by_username_for_auth(db: AsyncSession, username: str) -> Opti
     return result.scalar_one_or_none()
 
 
-async def get_current_user_from_cookie_web(
-    request: Request,
-    db: AsyncSession = Depends(database.get_async_db),
-) -> Optional[UserModel]:  # Returns UserModel or None
-    token = request.cookies.get("access_token")
-    if not token:
-        return None  # No token means user is not logged in, return None for optional auth
-
-    # If token IS present, then it MUST be valid, otherwise it's an error
+def _decode_access_token(token: str) -> dict[str, Any]:
+    """Verifies the access token and returns its payload (`sub`, `user_id`, ...), or raises 401."""
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str | None = payload.get("sub")
-        user_id: int | None = payload.get("user_id")
-        if username is None or user_id is None:
+        payload = verified_tokens.decode(token)
+        if payload.get("sub") is None or payload.get("user_id") is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid token payload.",
@@ -99,22 +150,96 @@ async def get_current_user_from_cookie_web(
             detail="Invalid or expired token.",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    return payload
+
+
+def _revoked_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token has been revoked.",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
 
-    user_repo = UserRepository(db_session=db)  # Assuming UserRepository is correctly imported
-    user = await user_repo.get_by_id(user_id=user_id)
+async def load_user_for_access_token(token: str, db: Optional[AsyncSession] = None) -> UserModel:
+    """
+    Resolves the user behind an access token, or raises 401.
+    On a user-cache miss the row is read from the primary: through `db` when there are no
+    replicas, otherwise through a short-lived primary session.
+    Stateless tokens are answered from their claims after a token-version check in Redis.
+    """
+    payload = _decode_access_token(token)
+    username, user_id = payload["sub"], payload["user_id"]
+
+    stateless = settings.STATELESS_ACCESS_TOKENS and "tv" in payload
+    if stateless:
+        current_version = await token_versions.get(user_id)
+        if current_version == payload["tv"]:
+            return user_from_claims(payload)
+        if current_version is not None:
+            raise _revoked_token()
+        # Version unknown (Redis unavailable, or the key was evicted): the regular lookup
+        # below checks the token against users.token_version instead
+
+    # Read-through cache: only go to Postgres when neither cache tier has the user.
+    # Cache fills read the primary: a lagging replica could put back the row update_user
+    # just invalidated (e.g. still active) for the whole cache TTL.
+    cached_user = await user_cache.get(user_id)
+    if cached_user is not None:
+        user = user_from_cache(cached_user)
+    elif db is not None and not database.replica_router.enabled:
+        user = await UserRepository(db_session=db).get_by_id(user_id=user_id)
+    else:
+        primary_only = {database.FORCE_PRIMARY_KEY: True}
+        async with database.ReadOnlySessionFactory(info=primary_only) as session:
+            user = await UserRepository(db_session=session).get_by_id(user_id=user_id)
+    if user is not None and cached_user is None:
+        await user_cache.set(user)
     if user is None or user.username != username:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found or token mismatch.",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if stateless:
+        if user.token_version != payload["tv"]:
+            raise _revoked_token()
+        await token_versions.advance(user_id, user.token_version)  # Re-seed the Redis copy
+    return user
+
+
+async def get_current_user_from_cookie_web(
+    request: Request,
+    db: AsyncSession = Depends(database.get_read_only_db),
+) -> Optional[UserModel]:  # Returns UserModel or None
+    # RequestContextMiddleware normally resolved the user already; reuse its outcome
+    state = request.scope.get("state") or {}
+    if state.get(CURRENT_USER_RESOLVED_KEY):
+        error = state.get(CURRENT_USER_ERROR_KEY)
+        if error is not None:
+            if error.status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
+                return None  # Lookup failed (DB/Redis): optional-auth pages render anonymously
+            raise error
+        return state.get("current_user")
+
+    token = request.cookies.get("access_token")
+    if not token:
+        return None  # No token means user is not logged in, return None for optional auth
+
+    # If token IS present, then it MUST be valid, otherwise it's an error
+    user = await load_user_for_access_token(token, db)
+    request.state.current_user = user
     return user  # Valid token, user found
 
 
 async def get_current_active_user_web(  # This dependency REQUIRES an active user
+    request: Request,
     current_user: Optional[UserModel] = Depends(get_current_user_from_cookie_web),  # Use the above
 ) -> UserModel:  # Returns UserModel or raises HTTPException
     if not current_user:  # get_current_user_from_cookie_web returned None (no token)
+        lookup_error = (request.scope.get("state") or {}).get(CURRENT_USER_ERROR_KEY)
+        if lookup_error is not None:  # The user could not be looked up: 503, not 401
+            raise lookup_error
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated.",
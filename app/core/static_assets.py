@@ -0,0 +1,252 @@
+# app/core/static_assets.py
+import hashlib
+import json
+import logging
+import os
+import shutil
+import stat
+from functools import lru_cache
+from mimetypes import guess_type
+from typing import Any, AsyncIterator, Optional
+
+import anyio
+from jinja2 import pass_context
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response, StreamingResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from app.core.config import settings
+from app.utils.compression import brotli, compress_body, negotiate_encoding
+
+logger = logging.getLogger(__name__)
+
+# Fingerprinted copies live in STATIC_DIR/dist so the source files stay untouched.
+BUILD_DIRNAME = "dist"
+MANIFEST_FILENAME = "manifest.json"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".mjs", ".map", ".ico", ".svg", ".json", ".txt", ".xml")
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+RANGE_CHUNK_SIZE = 64 * 1024
+
+
+def _manifest_path(static_dir: str) -> str:
+    return os.path.join(static_dir, BUILD_DIRNAME, MANIFEST_FILENAME)
+
+
+def _file_digest(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def _write_precompressed(file_path: str) -> None:
+    """Writes .br/.gz siblings for text-like assets, keeping only those that actually shrink."""
+    if os.path.splitext(file_path)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+        return
+    with open(file_path, "rb") as f:
+        body = f.read()
+    for encoding in PRECOMPRESSED_SUFFIXES:
+        if encoding == "br" and brotli is None:
+            continue
+        compressed = compress_body(body, encoding, level=9)
+        if len(compressed) < len(body) * 0.9:
+            with open(file_path + PRECOMPRESSED_SUFFIXES[encoding], "wb") as f:
+                f.write(compressed)
+
+
+def build_static_assets(static_dir: str = settings.STATIC_DIR) -> dict[str, str]:
+    """
+    Build step: copies every static file to `dist/<dir>/<name>.<hash><ext>` and writes
+    a manifest mapping the logical path (e.g. "css/style.css") to the fingerprinted one.
+    Text-like files (CSS/JS/ICO/SVG...) also get pre-compressed `.br`/`.gz` siblings.
+    Run it at deploy time with `python -m app.core.static_assets`.
+    """
+    build_dir = os.path.join(static_dir, BUILD_DIRNAME)
+    if os.path.isdir(build_dir):
+        shutil.rmtree(build_dir)
+
+    manifest: dict[str, str] = {}
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != build_dir)
+        for filename in sorted(files):
+            source_path = os.path.join(root, filename)
+            logical_path = os.path.relpath(source_path, static_dir).replace(os.sep, "/")
+            name, ext = os.path.splitext(logical_path)
+            hashed_path = f"{BUILD_DIRNAME}/{name}.{_file_digest(source_path)}{ext}"
+
+            target_path = os.path.join(static_dir, *hashed_path.split("/"))
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            shutil.copy2(source_path, target_path)
+            _write_precompressed(target_path)
+            manifest[logical_path] = hashed_path
+
+    with open(_manifest_path(static_dir), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    logger.info(f"Built {len(manifest)} fingerprinted static assets into {build_dir}.")
+    return manifest
+
+
+@lru_cache(maxsize=1)
+def load_manifest() -> dict[str, str]:
+    """Loads the build manifest once per process. Missing manifest -> unhashed paths (dev)."""
+    if not settings.STATIC_USE_MANIFEST:
+        return {}
+    try:
+        with open(_manifest_path(settings.STATIC_DIR), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        logger.info("No static asset manifest found; serving unhashed static paths.")
+        return {}
+
+
+def asset_path(path: str) -> str:
+    """Maps a logical static path to its fingerprinted path, if one was built."""
+    return load_manifest().get(path, path)
+
+
+@pass_context
+def static_url(context: Any, path: str) -> str:
+    """
+    Jinja global: `{{ static_url('css/style.css') }}`.
+    Drop-in replacement for `request.url_for('static', path=...)` that points at the
+    fingerprinted copy when available.
+    """
+    request = context["request"]
+    return str(request.url_for("static", path=asset_path(path)))
+
+
+@lru_cache(maxsize=4096)
+def _precompressed_variant(full_path: str, suffix: str) -> Optional[os.stat_result]:
+    """Stats a pre-compressed sibling once; built assets never change while the app runs."""
+    try:
+        stat_result = os.stat(full_path + suffix)
+    except OSError:
+        return None
+    return stat_result if stat.S_ISREG(stat_result.st_mode) else None
+
+
+def _parse_single_range(range_header: str, file_size: int) -> Optional[tuple[int, int]]:
+    """
+    Parses `bytes=start-end` / `bytes=start-` / `bytes=-suffix`. Returns inclusive (start, end),
+    or None for anything we do not serve as a partial response (multiple ranges, other units).
+    Raises ValueError when the range cannot be satisfied.
+    """
+    unit, _, ranges = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+    start_str, _, end_str = ranges.strip().partition("-")
+    try:
+        if not start_str:
+            suffix_length = int(end_str)
+        else:
+            start = int(start_str)
+            end = int(end_str) if end_str else file_size - 1
+    except ValueError:
+        return None
+    if not start_str:
+        if suffix_length <= 0:
+            raise ValueError("Empty suffix range")
+        return max(0, file_size - suffix_length), file_size - 1
+    if start >= file_size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, min(end, file_size - 1)
+
+
+class FingerprintedStaticFiles(StaticFiles):
+    """
+    StaticFiles tuned for built assets:
+    - fingerprinted files (dist/) are marked immutable for a year; their name changes
+      whenever their content does, so browsers never need to revalidate.
+    - `.br`/`.gz` siblings written by the build are served when the client accepts them,
+      so nothing is compressed per request (the app excludes /static from
+      CompressionMiddleware; files without siblings are sent as they are).
+    - single byte ranges get a 206 response; If-None-Match / If-Modified-Since get a 304.
+    """
+
+    def file_response(
+        self,
+        full_path: Any,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        range_header = request_headers.get("range")
+        full_path = str(full_path)
+        media_type = guess_type(full_path)[0] or "text/plain"
+        headers: dict[str, str] = {"Accept-Ranges": "bytes"}
+        if os.path.splitext(full_path)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+            headers["Vary"] = "Accept-Encoding"
+        if self.get_path(scope).replace(os.sep, "/").startswith(f"{BUILD_DIRNAME}/"):
+            headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+
+        # Ranges are served from the identity file so offsets are always the plain bytes
+        encoding = "identity"
+        if settings.STATIC_SERVE_PRECOMPRESSED and not range_header and "Vary" in headers:
+            encoding = negotiate_encoding(request_headers.get("accept-encoding", ""))
+        variant_stat = None
+        if encoding != "identity":
+            variant_stat = _precompressed_variant(full_path, PRECOMPRESSED_SUFFIXES[encoding])
+        if variant_stat is not None:
+            headers["Content-Encoding"] = encoding
+            full_path += PRECOMPRESSED_SUFFIXES[encoding]
+            stat_result = variant_stat
+
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            stat_result=stat_result,
+            media_type=media_type,
+            headers=headers,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+
+        if range_header and status_code == 200 and scope["method"] == "GET":
+            if_range = request_headers.get("if-range")
+            if if_range is None or if_range == response.headers.get("etag"):
+                return self._range_response(full_path, stat_result, range_header, response)
+        return response
+
+    @staticmethod
+    def _range_response(
+        full_path: str, stat_result: os.stat_result, range_header: str, response: Response
+    ) -> Response:
+        file_size = stat_result.st_size
+        try:
+            byte_range = _parse_single_range(range_header, file_size)
+        except ValueError:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{file_size}"})
+        if byte_range is None:
+            return response  # Unsupported range form: a full 200 response is always valid
+        start, end = byte_range
+
+        async def send_range() -> AsyncIterator[bytes]:
+            async with await anyio.open_file(full_path, mode="rb") as f:
+                await f.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    chunk = await f.read(min(RANGE_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+
+        headers = {
+            key: value
+            for key, value in response.headers.items()
+            if key not in ("content-length", "content-type")
+        }
+        headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            send_range(), status_code=206, headers=headers, media_type=response.media_type
+        )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    build_static_assets()
@@ -1,7 +1,21 @@
+from typing import Any, AsyncIterator, Mapping, Optional
 from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
+from jinja2 import FileSystemBytecodeCache, Template
 from app.core.config import settings
+from app.utils.compression import StreamingCompressor, negotiate_encoding
+from app.core.static_assets import static_url
+from app.core.responsive_images import responsive_image
 from jinja2_time import TimeExtension  # <--- Import the extension
 import datetime
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# base.html pops these from the session while rendering
+FLASH_SESSION_KEYS = ("flash_success", "flash_error", "flash_warning", "flash_info")
 
 
 def format_date(value, format="%Y-%m-%d"):
@@ -22,6 +36,14 @@ def format_date(value, format="%Y-%m-%d"):
     return dt.strftime(format)
 
 
+def _bytecode_cache() -> Optional[FileSystemBytecodeCache]:
+    """On-disk bytecode cache shared by all uvicorn workers, if a directory is configured."""
+    if not settings.TEMPLATE_BYTECODE_CACHE_DIR:
+        return None
+    os.makedirs(settings.TEMPLATE_BYTECODE_CACHE_DIR, exist_ok=True)
+    return FileSystemBytecodeCache(settings.TEMPLATE_BYTECODE_CACHE_DIR)
+
+
 # Initialize Jinja2Templates
 # The 'directory' should point to your 'templates' folder.
 # settings.TEMPLATES_DIR should be defined in your app.core.config.py
@@ -29,6 +51,7 @@ templates = Jinja2Templates(
     directory=str(settings.TEMPLATES_DIR),
     enable_async=True,
     extensions=["jinja2_time.TimeExtension"],  # <--- Add the TimeExtension here
+    bytecode_cache=_bytecode_cache(),
 )
 
 templates.env.filters["date"] = format_date
@@ -36,6 +59,11 @@ templates.env.filters["date"] = format_date
 # Make the 'settings' object available globally in all templates
 templates.env.globals["settings"] = settings
 
+# Fingerprinted static URLs: {{ static_url('css/style.css') }}
+templates.env.globals["static_url"] = static_url
+# <picture>/srcset markup for images with built derivatives
+templates.env.globals["responsive_image"] = responsive_image
+
 # You can also add other custom global functions or variables here if needed.
 # For example:
 # import datetime
@@ -43,3 +71,93 @@ templates.env.globals["settings"] = settings
 #     return datetime.datetime.now(datetime.timezone.utc).year
 # templates.env.globals["current_year"] = get_current_year
 # Then in template: {{ current_year }} (if you didn't want to use {% now %})
+
+
+def precompile_templates() -> dict[str, float]:
+    """
+    Compiles every template under TEMPLATES_DIR into the environment's cache so the first
+    visitors after a deploy or worker restart don't pay compile latency. With a bytecode
+    cache configured, later workers load the compiled code from disk instead of compiling.
+    Returns the compile time in milliseconds per template.
+    """
+    timings: dict[str, float] = {}
+    for template_name in templates.env.list_templates(extensions=["html", "txt", "xml"]):
+        if template_name.startswith("emails/"):
+            continue  # Own environment: app.services.email_templates.precompile_email_templates
+        started = time.perf_counter()
+        try:
+            templates.env.get_template(template_name)
+        except Exception as e:
+            logger.error(f"Template precompilation failed for {template_name}: {e}")
+            continue
+        timings[template_name] = (time.perf_counter() - started) * 1000
+        logger.info(f"Precompiled template {template_name} in {timings[template_name]:.1f} ms")
+    logger.info(
+        f"Precompiled {len(timings)} templates in {sum(timings.values()):.1f} ms "
+        f"(bytecode cache: {'on' if templates.env.bytecode_cache else 'off'})."
+    )
+    return timings
+
+
+async def _generate_chunks(
+    template: Template, context: dict[str, Any], compressor: Optional[StreamingCompressor]
+) -> AsyncIterator[bytes]:
+    """
+    Renders `template` incrementally. The first flush happens right after `</head>` so the
+    browser can start fetching CSS and fonts; after that output is batched into
+    TEMPLATE_STREAM_FLUSH_SIZE pieces instead of Jinja's many tiny fragments.
+    """
+    buffer: list[str] = []
+    buffered_size = 0
+    async for chunk in template.generate_async(context):
+        buffer.append(chunk)
+        buffered_size += len(chunk)
+        if "</head>" in chunk or buffered_size >= settings.TEMPLATE_STREAM_FLUSH_SIZE:
+            data = "".join(buffer).encode("utf-8")
+            buffer, buffered_size = [], 0
+            yield compressor.compress(data) if compressor else data
+    data = "".join(buffer).encode("utf-8")
+    if compressor:
+        yield compressor.compress(data) + compressor.finish()
+    elif data:
+        yield data
+
+
+async def stream_template(
+    template_name: str,
+    context: dict[str, Any],
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """
+    Streams a rendered template as HTML (`context` must contain "request"), with any extra
+    response `headers` (e.g. Retry-After on a 429/503 form error).
+    Falls back to a buffered HTMLResponse when a flash message is pending: base.html pops it
+    from the session during rendering, but the session cookie goes out with the headers,
+    i.e. before a streamed body is rendered.
+    Streamed bodies are compressed here, chunk by chunk, because the compression
+    middleware passes streaming responses through untouched.
+    """
+    template = templates.get_template(template_name)
+    request = context["request"]
+    session = request.scope.get("session") or {}
+    if not settings.TEMPLATE_STREAMING_ENABLED or any(
+        key in session for key in FLASH_SESSION_KEYS
+    ):
+        content = await template.render_async(context)
+        return HTMLResponse(content, status_code=status_code, headers=headers)
+
+    headers = dict(headers or {})
+    compressor: Optional[StreamingCompressor] = None
+    if settings.COMPRESSION_ENABLED:
+        headers["Vary"] = "Accept-Encoding"
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+        if encoding != "identity":
+            compressor = StreamingCompressor(encoding, level=settings.COMPRESSION_LEVEL)
+            headers["Content-Encoding"] = encoding
+    return StreamingResponse(
+        _generate_chunks(template, context, compressor),
+        status_code=status_code,
+        media_type="text/html",
+        headers=headers,
+    )
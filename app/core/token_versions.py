@@ -0,0 +1,63 @@
+# app/core/token_versions.py
+import logging
+from typing import Optional
+
+import redis.asyncio as aioredis
+
+from app.db.database import redis_pool
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] = version key, ARGV[1] = version. Never lowers the stored version, so a late or
+# out-of-order write cannot bring back tokens that a newer version revoked.
+ADVANCE_LUA = """
+local current = tonumber(redis.call('GET', KEYS[1]))
+if current == nil or current < tonumber(ARGV[1]) then
+    redis.call('SET', KEYS[1], ARGV[1])
+end
+return 0
+"""
+
+
+class TokenVersionStore:
+    """
+    Redis copy of the users' token versions, used to revoke stateless access tokens.
+
+    Every stateless access token carries the user's version at issue time (`tv` claim).
+    The version lives in `users.token_version`; raising it (password change, deactivation)
+    invalidates all tokens issued before it, and Redis answers the per-request check with
+    a single O(1) GET. A missing key means "unknown", not 0: after an eviction or data
+    loss the caller checks the users table and re-seeds the key with `advance`.
+    """
+
+    def __init__(self, *, key_prefix: str = "token_version:"):
+        self.key_prefix = key_prefix
+        self._advance_script = None
+
+    def redis_key(self, user_id: int) -> str:
+        return f"{self.key_prefix}{user_id}"
+
+    def _redis(self) -> aioredis.Redis:
+        return aioredis.Redis(connection_pool=redis_pool)
+
+    async def get(self, user_id: int) -> Optional[int]:
+        """Current version for the user, or None if unknown (no key, or Redis unavailable)."""
+        try:
+            raw = await self._redis().get(self.redis_key(user_id))
+        except Exception as e:
+            logger.warning(f"Token version: Redis read failed for user {user_id}: {e}")
+            return None
+        return int(raw) if raw is not None else None
+
+    async def advance(self, user_id: int, version: int) -> None:
+        """Records `version` (read from the users table) unless Redis already has a newer one."""
+        try:
+            if self._advance_script is None:
+                self._advance_script = self._redis().register_script(ADVANCE_LUA)
+            await self._advance_script(keys=[self.redis_key(user_id)], args=[version])
+        except Exception as e:
+            # Until the key is written, requests fall back to checking the users table
+            logger.error(f"Token version: could not record version of user {user_id}: {e}")
+
+
+token_versions = TokenVersionStore()
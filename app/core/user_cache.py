@@ -0,0 +1,140 @@
+# app/core/user_cache.py
+import json
+import logging
+from datetime import datetime
+from typing import Any, Optional
+
+import redis.asyncio as aioredis
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import settings
+from app.db.database import redis_pool
+from app.db.models.user_model import User
+from app.utils.ttl_cache import TTLLRUCache
+
+logger = logging.getLogger(__name__)
+
+# Columns copied into the cache. hashed_password is deliberately left out so that
+# password hashes never land in Redis; nothing on the page-rendering path reads it.
+CACHED_USER_FIELDS = (
+    "id",
+    "username",
+    "email",
+    "full_name",
+    "is_active",
+    "is_superuser",
+    "created_at",
+    "updated_at",
+    "last_login_at",
+    "token_version",
+)
+_DATETIME_FIELDS = {"created_at", "updated_at", "last_login_at"}
+
+
+def serialize_user(user: User) -> dict[str, Any]:
+    """Turns a User row into a JSON-safe dict of the cached columns."""
+    data: dict[str, Any] = {}
+    for field in CACHED_USER_FIELDS:
+        value = getattr(user, field)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        data[field] = value
+    return data
+
+
+def user_from_cache(data: dict[str, Any]) -> User:
+    """
+    Rebuilds a *detached* User from cached data.
+    The instance carries an identity key, so if a handler later adds it to a session
+    SQLAlchemy treats it as an existing row (UPDATE), never as a new one (INSERT).
+    """
+    values = dict(data)
+    for field in _DATETIME_FIELDS:
+        if values.get(field):
+            values[field] = datetime.fromisoformat(values[field])
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+
+class UserCache:
+    """
+    Read-through cache for authenticated users, keyed by user_id.
+
+    Two tiers:
+    - a small in-process LRU with a short TTL (per uvicorn worker, no network hop)
+    - Redis via the shared `redis_pool` (shared by all workers)
+
+    Invalidation clears both tiers of the current worker plus Redis. Other workers may
+    keep serving their local copy until its TTL runs out, so keep the local TTL short.
+    Redis errors are logged and treated as a cache miss; the database stays the source of truth.
+    """
+
+    def __init__(
+        self,
+        *,
+        local_maxsize: int,
+        local_ttl: float,
+        redis_ttl: int,
+        key_prefix: str = "user_cache:",
+        enabled: bool = True,
+    ):
+        self.redis_ttl = redis_ttl
+        self.key_prefix = key_prefix
+        self.enabled = enabled
+        self._local: TTLLRUCache[dict[str, Any]] = TTLLRUCache(local_maxsize, local_ttl)
+
+    def _redis_key(self, user_id: int) -> str:
+        return f"{self.key_prefix}{user_id}"
+
+    def _redis(self) -> aioredis.Redis:
+        return aioredis.Redis(connection_pool=redis_pool)
+
+    # --- Public API ---
+    async def get(self, user_id: int) -> Optional[dict[str, Any]]:
+        """Returns the cached user dict, or None on a miss in both tiers."""
+        if not self.enabled:
+            return None
+        data = self._local.get(user_id)
+        if data is not None:
+            return data
+        try:
+            raw = await self._redis().get(self._redis_key(user_id))
+        except Exception as e:
+            logger.warning(f"User cache: Redis read failed for user {user_id}: {e}")
+            return None
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        self._local.set(user_id, data)
+        return data
+
+    async def set(self, user: User) -> None:
+        if not self.enabled:
+            return
+        data = serialize_user(user)
+        self._local.set(user.id, data)
+        try:
+            await self._redis().set(self._redis_key(user.id), json.dumps(data), ex=self.redis_ttl)
+        except Exception as e:
+            logger.warning(f"User cache: Redis write failed for user {user.id}: {e}")
+
+    async def invalidate(self, user_id: int) -> None:
+        self._local.pop(user_id)
+        if not self.enabled:
+            return
+        try:
+            await self._redis().delete(self._redis_key(user_id))
+        except Exception as e:
+            logger.warning(f"User cache: Redis invalidation failed for user {user_id}: {e}")
+
+    def clear_local(self) -> None:
+        self._local.clear()
+
+
+user_cache = UserCache(
+    local_maxsize=settings.USER_CACHE_LOCAL_MAXSIZE,
+    local_ttl=settings.USER_CACHE_LOCAL_TTL_SECONDS,
+    redis_ttl=settings.USER_CACHE_REDIS_TTL_SECONDS,
+    enabled=settings.USER_CACHE_ENABLED,
+)
@@ -1,8 +1,19 @@
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from fastapi import Request
+from sqlalchemy import Select, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, DeclarativeBase  # Import DeclarativeBase
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase  # Import DeclarativeBase
 from app.core.config import settings
+from app.db.pool_metrics import InstrumentedQueuePool
+from app.db.replicas import ReplicaRouter
 import redis.asyncio as aioredis  # For async Redis
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
 
 
 # Define the SQLAlchemy declarative base
@@ -17,24 +28,195 @@ async_engine = create_async_engine(
     max_overflow=settings.DB_MAX_OVERFLOW,
     echo=False,  # Set to True for SQL logging in development
     pool_pre_ping=True,  # Helps with stale connections
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    poolclass=InstrumentedQueuePool,  # Checkout wait/in-use metrics (app.db.pool_metrics)
+    pool_logging_name="primary",
 )
 
+# Read replicas (optional); reads are routed there by RoutingSession below
+replica_router = ReplicaRouter(
+    [str(url) for url in settings.DATABASE_REPLICA_URLS],
+    max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+)
+
+# --- Write tracking, so sessions that only read are not committed (and stay on replicas) ---
+WRITES_KEY = "has_writes"
+FORCE_PRIMARY_KEY = "force_primary"  # Read-your-writes: set for a while after a write
+
+
+class RoutingSession(Session):
+    """
+    Sends SELECTs to a healthy read replica and everything else to the primary.
+
+    A session sticks to the primary once it has written (read-your-writes within the
+    request), while flushing, and when created with `info={FORCE_PRIMARY_KEY: True}`
+    (read-your-writes across requests, see get_async_db). Without replicas this is
+    a plain Session.
+    """
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        if (
+            replica_router.enabled
+            and isinstance(clause, Select)
+            and not self._flushing
+            and not self.info.get(WRITES_KEY)
+            and not self.info.get(FORCE_PRIMARY_KEY)
+        ):
+            replica = replica_router.pick()
+            if replica is not None:
+                return replica.sync_engine
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
 # Async Session Factory
 AsyncSessionFactory = sessionmaker(
     bind=async_engine,
     class_=AsyncSession,
+    sync_session_class=RoutingSession,
     expire_on_commit=False,  # Important for async usage
     autoflush=False,
     autocommit=False,
 )
 
+# Sessions that never write (and are never committed); see get_read_only_db
+ReadOnlySessionFactory = sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    expire_on_commit=False,
+    autoflush=False,
+    autocommit=False,
+    info={"read_only": True},
+)
+
+
+# --- Per-request query statistics ---
+@dataclass
+class QueryStats:
+    statements: int = 0
+    transactions: int = 0
+    commits: int = 0
+
+    def as_header(self) -> str:
+        return (
+            f"statements={self.statements}, transactions={self.transactions}, "
+            f"commits={self.commits}"
+        )
+
+
+# Set per request by app.core.request_context.RequestContextMiddleware
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    stats = query_stats.get()
+    if stats is not None:
+        stats.statements += 1
+
+
+@event.listens_for(Engine, "begin")
+def _count_transaction(conn):
+    stats = query_stats.get()
+    if stats is not None:
+        stats.transactions += 1
+
+
+@event.listens_for(Engine, "commit")
+def _count_commit(conn):
+    stats = query_stats.get()
+    if stats is not None:
+        stats.commits += 1
 
-async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
-    """FastAPI dependency to get an async database session."""
-    async with AsyncSessionFactory() as session:
+
+@event.listens_for(Session, "before_flush")
+def _guard_read_only_flush(session, flush_context, instances):
+    if session.info.get("read_only"):
+        raise RuntimeError("Attempted to write through a read-only session.")
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush_write(session, flush_context):
+    session.info[WRITES_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_statement_write(orm_execute_state):
+    state = orm_execute_state
+    is_write = state.is_insert or state.is_update or state.is_delete
+    if is_write and state.session.info.get("read_only"):
+        raise RuntimeError("Attempted to write through a read-only session.")
+    if not state.is_select:  # Includes text() statements: commit them to be safe
+        state.session.info[WRITES_KEY] = True
+
+
+# --- Work that must only happen once the transaction is committed (e.g. cache invalidation) ---
+AFTER_COMMIT_KEY = "after_commit"
+
+
+def run_after_commit(session: AsyncSession, callback: Callable[[], Awaitable[None]]) -> None:
+    """
+    Runs `callback` after get_async_db committed the session's transaction. Invalidating a
+    cache before the commit lets a concurrent request re-cache the old committed row.
+    Dropped if the transaction is rolled back.
+    """
+    session.info.setdefault(AFTER_COMMIT_KEY, []).append(callback)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_after_commit_callbacks(session):
+    session.info.pop(AFTER_COMMIT_KEY, None)
+
+
+async def _run_after_commit_callbacks(session: AsyncSession) -> None:
+    for callback in session.info.pop(AFTER_COMMIT_KEY, []):
+        try:
+            await callback()
+        except Exception as e:  # The data is committed; don't fail the request
+            logger.error(f"After-commit callback failed: {e}", exc_info=True)
+
+
+def session_has_writes(session: AsyncSession) -> bool:
+    """True if the session flushed/executed writes or still holds pending changes."""
+    return bool(session.info.get(WRITES_KEY) or session.new or session.dirty or session.deleted)
+
+
+# Key in the (cookie) session: until this timestamp, the client's reads go to the primary
+PRIMARY_UNTIL_SESSION_KEY = "db_primary_until"
+
+
+def _prefers_primary(request: Request) -> bool:
+    cookie_session = request.scope.get("session") or {}
+    return cookie_session.get(PRIMARY_UNTIL_SESSION_KEY, 0) > time.time()
+
+
+def _stick_to_primary(request: Request) -> None:
+    if replica_router.enabled and "session" in request.scope:
+        request.scope["session"][PRIMARY_UNTIL_SESSION_KEY] = (
+            time.time() + settings.DB_READ_YOUR_WRITES_SECONDS
+        )
+
+
+async def get_async_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    FastAPI dependency to get an async database session.
+    Committed only if the request wrote something; pure reads just release the
+    connection, saving the COMMIT round trip on every read-only request.
+    After a write, the client's reads stay on the primary for DB_READ_YOUR_WRITES_SECONDS
+    so replica lag never hides its own changes (e.g. login right after registering).
+    """
+    session_info = {FORCE_PRIMARY_KEY: _prefers_primary(request)}
+    async with AsyncSessionFactory(info=session_info) as session:
         try:
             yield session
-            await session.commit()  # Not committing here, services should handle transactions
+            if session_has_writes(session):
+                await session.commit()
+                _stick_to_primary(request)
+                await _run_after_commit_callbacks(session)
         except Exception:
             await session.rollback()
             raise
@@ -42,6 +224,17 @@ async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+async def get_read_only_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    FastAPI dependency for handlers that only read. Queries go to a read replica when
+    DATABASE_REPLICA_URLS is set; never commits, and raises on any attempted write.
+    """
+    async with ReadOnlySessionFactory(
+        info={FORCE_PRIMARY_KEY: _prefers_primary(request)}
+    ) as session:
+        yield session
+
+
 # Async Redis Connection Pool
 redis_pool = aioredis.ConnectionPool.from_url(str(settings.REDIS_URL), decode_responses=True)
 
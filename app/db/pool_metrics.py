@@ -0,0 +1,109 @@
+# app/db/pool_metrics.py
+import math
+import time
+from collections import deque
+from typing import Any
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Recent samples kept per pool for percentiles (bounded; old samples fall off)
+SAMPLE_SIZE = 2048
+# Advisory sizing: pool_size covers p95 concurrency, overflow covers the peak, plus headroom
+ADVISORY_HEADROOM = 1.2
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class PoolMetrics:
+    """Checkout wait times, in-use/overflow counts and timeouts of one connection pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.checkouts = 0
+        self.timeouts = 0
+        self.max_wait = 0.0
+        self.peak_in_use = 0
+        self._waits: deque[float] = deque(maxlen=SAMPLE_SIZE)
+        self._in_use: deque[int] = deque(maxlen=SAMPLE_SIZE)
+        self._pool: Any = None
+
+    def record_checkout(self, pool: "InstrumentedQueuePool", wait: float) -> None:
+        self._pool = pool
+        in_use = pool.checkedout()
+        self.checkouts += 1
+        self.max_wait = max(self.max_wait, wait)
+        self.peak_in_use = max(self.peak_in_use, in_use)
+        self._waits.append(wait)
+        self._in_use.append(in_use)
+
+    def record_timeout(self, pool: "InstrumentedQueuePool") -> None:
+        self._pool = pool
+        self.timeouts += 1
+
+    def recommend(self, workers: int) -> dict[str, Any]:
+        """Advisory pool sizing from observed concurrency; nothing is changed automatically."""
+        in_use = list(self._in_use)
+        pool_size = max(1, math.ceil(_percentile(in_use, 95) * ADVISORY_HEADROOM))
+        peak = max(self.peak_in_use, pool_size)
+        max_overflow = max(0, math.ceil(peak * ADVISORY_HEADROOM) - pool_size)
+        if self.timeouts:
+            max_overflow = max(max_overflow, pool_size)  # Waiters timed out: allow bursts
+        return {
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "workers": workers,
+            # What Postgres max_connections must accommodate for this pool across all workers
+            "connections_per_deployment": workers * (pool_size + max_overflow),
+            "based_on_checkouts": len(in_use),
+        }
+
+    def snapshot(self) -> dict[str, Any]:
+        waits = list(self._waits)
+        pool = self._pool
+        return {
+            "pool_size": pool.size() if pool else None,
+            "in_use": pool.checkedout() if pool else 0,
+            "overflow": max(0, pool.overflow()) if pool else 0,
+            "idle": pool.checkedin() if pool else 0,
+            "peak_in_use": self.peak_in_use,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_ms": {
+                "p50": round(_percentile(waits, 50) * 1000, 3),
+                "p95": round(_percentile(waits, 95) * 1000, 3),
+                "p99": round(_percentile(waits, 99) * 1000, 3),
+                "max": round(self.max_wait * 1000, 3),
+            },
+        }
+
+
+# One PoolMetrics per pool name; survives engine.dispose(), which recreates the pool
+pool_metrics: dict[str, PoolMetrics] = {}
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that times every checkout (including the wait for a free
+    connection) and counts pool timeouts. Use with `pool_logging_name` to name the pool.
+    """
+
+    def __init__(self, creator, **kw):
+        super().__init__(creator, **kw)
+        name = kw.get("logging_name") or "default"
+        self.metrics = pool_metrics.setdefault(name, PoolMetrics(name))
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_timeout(self)
+            raise
+        self.metrics.record_checkout(self, time.perf_counter() - started)
+        return connection
@@ -0,0 +1,117 @@
+# app/db/replicas.py
+import asyncio
+import itertools
+import logging
+from typing import Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.db.pool_metrics import InstrumentedQueuePool
+
+logger = logging.getLogger(__name__)
+
+# Replay lag in seconds. An idle primary produces no new WAL, so a replica that has replayed
+# everything it received counts as 0 lag however old its last replayed transaction is.
+REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+class ReplicaRouter:
+    """
+    Pool of read-replica engines with lag-aware selection.
+
+    A background task measures each replica's replay lag every `check_interval` seconds.
+    `pick()` round-robins over replicas whose lag is at most `max_lag`, and returns None
+    (meaning: use the primary) when no replica is configured or none is healthy.
+    Replicas are considered healthy until the first check says otherwise.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        *,
+        max_lag: float,
+        check_interval: float,
+        pool_size: int,
+        max_overflow: int,
+        pool_timeout: int,
+    ):
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.engines: list[AsyncEngine] = [
+            create_async_engine(
+                str(url),
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                echo=False,
+                pool_pre_ping=True,
+                pool_timeout=pool_timeout,
+                poolclass=InstrumentedQueuePool,
+                pool_logging_name=f"replica-{index}",
+            )
+            for index, url in enumerate(urls)
+        ]
+        self.lag: dict[int, Optional[float]] = {i: 0.0 for i in range(len(self.engines))}
+        self._healthy: list[AsyncEngine] = list(self.engines)
+        self._round_robin = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.engines)
+
+    def pick(self) -> Optional[AsyncEngine]:
+        healthy = self._healthy
+        if not healthy:
+            return None
+        return healthy[next(self._round_robin) % len(healthy)]
+
+    async def _measure_lag(self, engine: AsyncEngine) -> Optional[float]:
+        try:
+            async with engine.connect() as conn:
+                return float((await conn.execute(REPLICA_LAG_SQL)).scalar_one())
+        except Exception as e:
+            logger.warning(f"Replica {engine.url.host}: lag check failed: {e}")
+            return None
+
+    async def check_lag(self) -> None:
+        lags = await asyncio.gather(*(self._measure_lag(engine) for engine in self.engines))
+        healthy = []
+        for index, (engine, lag) in enumerate(zip(self.engines, lags)):
+            self.lag[index] = lag
+            if lag is not None and lag <= self.max_lag:
+                healthy.append(engine)
+            else:
+                logger.warning(f"Replica {engine.url.host} taken out of rotation (lag: {lag}).")
+        self._healthy = healthy
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.check_lag()
+            except Exception as e:  # Never let the loop die
+                logger.error(f"Replica lag check loop error: {e}", exc_info=True)
+            await asyncio.sleep(self.check_interval)
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run(), name="replica-lag-check")
+
+    async def dispose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for engine in self.engines:
+            await engine.dispose()
@@ -1,5 +1,4 @@
 from fastapi import FastAPI, Request, status
-from fastapi.staticfiles import StaticFiles
 
 # from fastapi.templating import Jinja2Templates # Already handled by app.core.templating
 from fastapi.responses import HTMLResponse, RedirectResponse
@@ -11,7 +10,11 @@ from jinja2.exceptions import TemplateNotFound  # Import this for specific excep
 from app.core.config import settings
 from app.core.lifespan import lifespan
 from app.core.templating import templates  # Your Jinja2Templates instance
+from app.core.static_assets import FingerprintedStaticFiles
+from app.core.compression_middleware import CompressionMiddleware
+from app.core.request_context import RequestContextMiddleware
 from app.web.routers import pages_web, auth_web, dashboard_web
+from app.api.v1.endpoints import metrics_api
 from app.utils.logging_config import setup_logging
 
 import logging  # For logging within the handler
@@ -41,13 +44,28 @@ app.add_middleware(
     https_only=settings.ENVIRONMENT != "development",
 )
 
+# Resolves the logged-in user once per request into request.state.current_user
+app.add_middleware(RequestContextMiddleware)
+
+# Added last so it wraps everything else and sees final response bodies
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        level=settings.COMPRESSION_LEVEL,
+        offload_size=settings.COMPRESSION_OFFLOAD_SIZE,
+        content_types=settings.COMPRESSION_CONTENT_TYPES,
+        exclude_paths=("/static/",),  # Served pre-compressed by FingerprintedStaticFiles
+    )
+
 # --- Static Files & Templates ---
-app.mount("/static", StaticFiles(directory=settings.STATIC_DIR), name="static")
+app.mount("/static", FingerprintedStaticFiles(directory=settings.STATIC_DIR), name="static")
 
 # --- Routers ---
 app.include_router(pages_web.router)
 app.include_router(auth_web.router)
 app.include_router(dashboard_web.router)
+app.include_router(metrics_api.router, prefix=settings.API_V1_STR)
 
 
 # --- Custom Exception Handlers ---
@@ -94,9 +112,9 @@ async def custom_http_exception_handler(request: Request, exc: StarletteHTTPExce
             "title": f"Error {exc.status_code}",
             "status_code": exc.status_code,  # Explicitly pass status_code
             "detail": exc.detail,
-            "current_user": (
-                request.state.current_user if hasattr(request.state, "current_user") else None
-            ),
+            "current_user": getattr(
+                request.state, "current_user", None
+            ),  # RequestContextMiddleware
         }
 
         try:
@@ -165,19 +183,6 @@ async def custom_http_exception_handler(request: Request, exc: StarletteHTTPExce
     return await fastapi_http_exception_handler(request, exc)
 
 
-# ... (rest of your main.py, including the add_user_to_request_state middleware if you use it, and uvicorn.run) ...
-
-
-# Example of add_user_to_request_state (keep your existing logic or refine as needed)
-@app.middleware("http")
-async def add_user_to_request_state(request: Request, call_next):
-    # Your existing logic for setting request.state.current_user
-    # This middleware is just an example placeholder.
-    # Ensure your actual middleware correctly handles DB sessions if needed.
-    response = await call_next(request)
-    return response
-
-
 if __name__ == "__main__":
     import uvicorn
 
@@ -1,7 +1,29 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+    Union,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update as sqlalchemy_update, delete as sqlalchemy_delete, func
+from sqlalchemy import (
+    insert as sqlalchemy_insert,
+    update as sqlalchemy_update,
+    delete as sqlalchemy_delete,
+    func,
+    tuple_,
+)
 from pydantic import BaseModel
 from app.db.base_model import Base
 
@@ -10,6 +32,36 @@ CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+# Rows per executemany batch in the bulk methods (bounds memory and statement size)
+BULK_CHUNK_SIZE = 1000
+
+# Columns keyset pagination can order by; `id` breaks ties so the order is always total
+KEYSET_COLUMNS = ("id", "created_at")
+
+
+@dataclass
+class KeysetPage(Generic[ModelType]):
+    items: List[ModelType]
+    next_cursor: Optional[str]  # None on the last page
+
+
+def encode_cursor(data: Dict[str, Any]) -> str:
+    raw = json.dumps(data, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Raises ValueError for anything that is not a cursor produced by encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError("Invalid pagination cursor.") from e
+    if not isinstance(data, dict) or not {"o", "d", "v"} <= data.keys():
+        raise ValueError("Invalid pagination cursor.")
+    return data
+
+
 class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         self.model = model
@@ -22,10 +74,83 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     async def get_multi(
         self, db: AsyncSession, *, skip: int = 0, limit: int = 100
     ) -> List[ModelType]:
-        statement = select(self.model).offset(skip).limit(limit)
+        # Offset pagination gets slower with every page; prefer get_page for large tables
+        statement = select(self.model).order_by(self.model.id).offset(skip).limit(limit)
         result = await db.execute(statement)
         return result.scalars().all()  # type: ignore
 
+    def _keyset_order(self, order_by: str, descending: bool) -> List[Any]:
+        if order_by not in KEYSET_COLUMNS:
+            raise ValueError(f"Cannot paginate by '{order_by}'; use one of {KEYSET_COLUMNS}.")
+        columns = [getattr(self.model, order_by)]
+        if order_by != "id":
+            columns.append(self.model.id)
+        return columns
+
+    async def get_page(
+        self,
+        db: AsyncSession,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        order_by: str = "id",
+        descending: bool = False,
+    ) -> KeysetPage[ModelType]:
+        """
+        Keyset (seek) pagination: each page continues after the last row of the previous
+        one, so every page costs the same index range scan however deep it is, and rows
+        inserted meanwhile never shift or duplicate entries. Pass the returned
+        `next_cursor` back to get the following page; the cursor is opaque to clients.
+        """
+        columns = self._keyset_order(order_by, descending)
+        names = [column.key for column in columns]
+        statement = select(self.model)
+        if cursor is not None:
+            data = decode_cursor(cursor)
+            if data["o"] != order_by or data["d"] != descending or len(data["v"]) != len(names):
+                raise ValueError("Pagination cursor does not match the requested ordering.")
+            values = [
+                datetime.fromisoformat(value) if name == "created_at" else value
+                for name, value in zip(names, data["v"])
+            ]
+            key = tuple_(*columns) if len(columns) > 1 else columns[0]
+            last = tuple_(*values) if len(values) > 1 else values[0]
+            statement = statement.where(key < last if descending else key > last)
+        statement = statement.order_by(
+            *(column.desc() if descending else column.asc() for column in columns)
+        ).limit(limit + 1)  # One extra row tells whether another page exists
+
+        items = list((await db.execute(statement)).scalars().all())
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor(
+                {"o": order_by, "d": descending, "v": [getattr(items[-1], n) for n in names]}
+            )
+        return KeysetPage(items=items, next_cursor=next_cursor)
+
+    async def stream(
+        self,
+        db: AsyncSession,
+        *,
+        batch_size: int = 500,
+        order_by: str = "id",
+        descending: bool = False,
+    ) -> AsyncIterator[ModelType]:
+        """
+        Iterates over the whole table through a server-side cursor, fetching `batch_size`
+        rows per round trip, so exports and admin listings use constant memory.
+        """
+        columns = self._keyset_order(order_by, descending)
+        statement = (
+            select(self.model)
+            .order_by(*(column.desc() if descending else column.asc() for column in columns))
+            .execution_options(yield_per=batch_size)
+        )
+        result = await db.stream_scalars(statement)
+        async for obj in result:
+            yield obj
+
     async def get_count(self, db: AsyncSession) -> int:
         statement = select(func.count()).select_from(self.model)
         result = await db.execute(statement)
@@ -40,21 +165,89 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         await db.refresh(db_obj)
         return db_obj
 
+    async def bulk_create(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[CreateSchemaType],
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> List[ModelType]:
+        """
+        Inserts many rows with batched INSERT ... RETURNING (one round trip per chunk
+        instead of add/flush/refresh per row). Returns the created objects in input order.
+        """
+        created: List[ModelType] = []
+        statement = sqlalchemy_insert(self.model).returning(
+            self.model, sort_by_parameter_order=True
+        )
+        for start in range(0, len(objs_in), chunk_size):
+            rows = [obj.model_dump() for obj in objs_in[start : start + chunk_size]]
+            created.extend((await db.scalars(statement, rows)).all())
+        return created
+
+    async def bulk_update(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[Union[UpdateSchemaType, Dict[str, Any]]],
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> int:
+        """
+        Updates many rows by primary key with executemany UPDATEs. Every item must carry
+        `id`; only the fields that are set are written. Returns the number of rows sent.
+        """
+        rows = [
+            obj if isinstance(obj, dict) else obj.model_dump(exclude_unset=True) for obj in objs_in
+        ]
+        if any("id" not in row for row in rows):
+            raise ValueError("bulk_update needs an 'id' in every item.")
+        for start in range(0, len(rows), chunk_size):
+            await db.execute(sqlalchemy_update(self.model), rows[start : start + chunk_size])
+        return len(rows)
+
+    async def upsert_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[CreateSchemaType],
+        index_elements: Sequence[str],
+        update_fields: Optional[Sequence[str]] = None,
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> List[ModelType]:
+        """
+        PostgreSQL INSERT ... ON CONFLICT (index_elements) DO UPDATE ... RETURNING, in
+        chunks. `update_fields` defaults to every provided field except the conflict keys.
+        Returns the inserted or updated objects in input order.
+        """
+        upserted: List[ModelType] = []
+        for start in range(0, len(objs_in), chunk_size):
+            rows = [obj.model_dump() for obj in objs_in[start : start + chunk_size]]
+            if not rows:
+                continue
+            statement = pg_insert(self.model)
+            fields = update_fields or [key for key in rows[0] if key not in index_elements]
+            set_ = {field: statement.excluded[field] for field in fields}
+            if hasattr(self.model, "updated_at") and "updated_at" not in set_:
+                set_["updated_at"] = func.now()  # onupdate defaults do not fire on conflict
+            statement = (
+                statement.on_conflict_do_update(index_elements=index_elements, set_=set_)
+                .returning(self.model, sort_by_parameter_order=True)
+                .execution_options(populate_existing=True)
+            )
+            upserted.extend((await db.scalars(statement, rows)).all())
+        return upserted
+
     async def update(
         self,
         db: AsyncSession,
         *,
         db_obj: ModelType,
-        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
     ) -> ModelType:
         obj_data = (
             db_obj.model_dump() if hasattr(db_obj, "model_dump") else vars(db_obj)
         )  # vars is fallback
-        update_data = (
-            obj_in
-            if isinstance(obj_in, dict)
-            else obj_in.model_dump(exclude_unset=True)
-        )
+        update_data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
 
         for field in obj_data:
             if field in update_data:
@@ -3,7 +3,11 @@ from sqlalchemy import select, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
+from app.db import database
 from app.db.models.user_model import User
+from app.core.user_cache import user_cache
+from app.core.token_versions import token_versions
+from app.core.refresh_tokens import refresh_tokens
 from app.db.schemas import user_schemas  # This will now have UserCreatePasswordHashing
 
 
@@ -77,13 +81,32 @@ class UserRepository:
         Update an existing user.
         Expects user_update_data to be a schema containing fields to update,
         including potentially a new hashed_password.
+        The user cache and tokens are updated once get_async_db has committed.
         """
         update_data = user_update_data.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             if hasattr(user, field):
                 setattr(user, field, value)
+        logout_everywhere = "hashed_password" in update_data or "is_active" in update_data
+        if logout_everywhere:
+            # Revokes every stateless access token; incremented in SQL so concurrent
+            # updates cannot both write the same version
+            user.token_version = User.token_version + 1
 
         self.db_session.add(user)  # Add to session to mark as dirty if changed
         await self.db_session.flush()
         await self.db_session.refresh(user)
+        user_id, token_version = user.id, user.token_version
+
+        async def sync_caches() -> None:
+            # After the commit: before it, a concurrent cache miss would re-cache the old row
+            await user_cache.invalidate(user_id)
+            if logout_everywhere:
+                # Log the user out everywhere: stateless access tokens and refresh-token families
+                await token_versions.advance(user_id, token_version)
+                await refresh_tokens.revoke_user(user_id)
+            else:
+                await refresh_tokens.update_user(user)
+
+        database.run_after_commit(self.db_session, sync_caches)
         return user
@@ -0,0 +1,442 @@
+# app/services/async_smtp.py
+import asyncio
+import base64
+import copy
+import logging
+import re
+import smtplib
+import ssl
+import time
+from contextlib import asynccontextmanager
+from email.generator import BytesGenerator
+from email.message import Message
+from email.utils import getaddresses
+from io import BytesIO
+from typing import AsyncIterator, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean the connection itself is gone (as opposed to e.g. a refused recipient).
+# asyncio.TimeoutError (raised by wait_for) is only an alias of TimeoutError from 3.11 on.
+CONNECTION_ERRORS = (
+    smtplib.SMTPServerDisconnected,
+    ConnectionError,
+    TimeoutError,
+    asyncio.TimeoutError,
+)
+
+_LINE_END = re.compile(rb"\r\n|\r|\n")
+_LEADING_DOT = re.compile(rb"(?m)^\.")
+
+
+def _envelope(msg: Message) -> tuple[str, list[str]]:
+    """Envelope sender and recipients from the headers, like smtplib.send_message."""
+    sender = msg["Sender"] or msg["From"]
+    from_addr = getaddresses([sender])[0][1] if sender else ""
+    fields = [value for header in ("To", "Cc", "Bcc") for value in msg.get_all(header, [])]
+    to_addrs = [address for _, address in getaddresses(fields) if address]
+    return from_addr, to_addrs
+
+
+def _message_data(msg: Message) -> bytes:
+    """The DATA payload: CRLF line endings, dot-stuffed, terminated by <CRLF>.<CRLF>."""
+    if msg["Bcc"] is not None:
+        msg = copy.copy(msg)
+        del msg["Bcc"]
+    buffer = BytesIO()
+    BytesGenerator(buffer, policy=msg.policy.clone(linesep="\r\n")).flatten(msg)
+    data = _LEADING_DOT.sub(b"..", _LINE_END.sub(b"\r\n", buffer.getvalue()))
+    if not data.endswith(b"\r\n"):
+        data += b"\r\n"
+    return data + b".\r\n"
+
+
+class AsyncSMTPConnection:
+    """
+    Minimal SMTP client on asyncio streams: EHLO, STARTTLS, AUTH PLAIN/LOGIN, and
+    message submission. When the server advertises PIPELINING, MAIL FROM, every RCPT TO
+    and DATA are written in one go and their replies read afterwards (one round trip
+    instead of 2 + recipients). One transaction at a time; see AsyncSMTPPool for concurrency.
+    Errors are raised as the smtplib exception types. `python -m app.services.smtp_standin`
+    exercises it against a local stand-in server.
+    """
+
+    def __init__(
+        self,
+        *,
+        host: str,
+        port: int,
+        user: Optional[str],
+        password: Optional[str],
+        use_tls: bool,
+        timeout: float,
+        ssl_context: Optional[ssl.SSLContext] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.ssl_context = ssl_context
+        self.features: dict[str, str] = {}
+        self.messages = 0
+        self.last_used = time.monotonic()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None  # The loop that opened it
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def _read_reply(self) -> tuple[int, str]:
+        lines = []
+        while True:
+            line = await asyncio.wait_for(self._reader.readline(), self.timeout)
+            if not line:
+                self.close()
+                raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed.")
+            text = line.decode("utf-8", "replace").rstrip("\r\n")
+            lines.append(text[4:])
+            if text[3:4] != "-":
+                try:
+                    return int(text[:3]), "\n".join(lines)
+                except ValueError as e:
+                    self.close()
+                    raise smtplib.SMTPServerDisconnected(f"Malformed reply: {text!r}") from e
+
+    async def _write(self, data: bytes) -> None:
+        if self._writer is None:
+            raise smtplib.SMTPServerDisconnected("Not connected.")
+        self._writer.write(data)
+        await asyncio.wait_for(self._writer.drain(), self.timeout)
+
+    async def command(self, line: str) -> tuple[int, str]:
+        await self._write(f"{line}\r\n".encode())
+        return await self._read_reply()
+
+    async def _expect(self, line: str, expected: int) -> str:
+        code, text = await self.command(line)
+        if code != expected:
+            raise smtplib.SMTPResponseException(code, text)
+        return text
+
+    async def _ehlo(self) -> None:
+        text = await self._expect("EHLO localhost", 250)
+        self.features = {}
+        for feature in text.split("\n")[1:]:
+            name, _, params = feature.partition(" ")
+            self.features[name.upper()] = params
+
+    async def connect(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+        try:
+            code, text = await self._read_reply()
+            if code != 220:
+                raise smtplib.SMTPConnectError(code, text)
+            await self._ehlo()
+            if self.use_tls:
+                if "STARTTLS" not in self.features:
+                    raise smtplib.SMTPNotSupportedError("Server does not support STARTTLS.")
+                await self._expect("STARTTLS", 220)
+                await self._start_tls()
+                await self._ehlo()  # Capabilities may differ after TLS
+            if self.user and self.password:
+                await self._login()
+        except BaseException:
+            self.close()
+            raise
+
+    async def _start_tls(self) -> None:
+        """Upgrades the connection in place and rebinds the streams to the TLS transport."""
+        context = self.ssl_context or ssl.create_default_context()
+        if hasattr(self._writer, "start_tls"):  # Python 3.11+
+            await asyncio.wait_for(
+                self._writer.start_tls(context, server_hostname=self.host), self.timeout
+            )
+            return
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        protocol = asyncio.StreamReaderProtocol(reader)
+        transport = await asyncio.wait_for(
+            loop.start_tls(self._writer.transport, protocol, context, server_hostname=self.host),
+            self.timeout,
+        )
+        protocol.connection_made(transport)  # start_tls does not call it for us
+        self._reader = reader
+        self._writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+
+    async def _login(self) -> None:
+        mechanisms = self.features.get("AUTH", "").upper().split()
+        if "PLAIN" in mechanisms or not mechanisms:
+            token = base64.b64encode(f"\0{self.user}\0{self.password}".encode()).decode()
+            code, text = await self.command(f"AUTH PLAIN {token}")
+        else:
+            await self._expect("AUTH LOGIN", 334)
+            await self._expect(base64.b64encode(self.user.encode()).decode(), 334)
+            code, text = await self.command(base64.b64encode(self.password.encode()).decode())
+        if code != 235:
+            raise smtplib.SMTPAuthenticationError(code, text)
+
+    async def send_message(self, msg: Message) -> dict[str, tuple[int, str]]:
+        """Sends one message; returns refused recipients like smtplib.sendmail."""
+        from_addr, to_addrs = _envelope(msg)
+        if not to_addrs:
+            raise smtplib.SMTPRecipientsRefused({})
+        data = _message_data(msg)
+        commands = [f"MAIL FROM:<{from_addr}>"] + [f"RCPT TO:<{a}>" for a in to_addrs]
+        if "PIPELINING" in self.features:
+            await self._write("".join(f"{c}\r\n" for c in [*commands, "DATA"]).encode())
+            replies = [await self._read_reply() for _ in range(len(commands) + 1)]
+        else:
+            replies = []
+            for line in commands:
+                replies.append(await self.command(line))
+                if replies[0][0] != 250:
+                    break
+            if replies[0][0] == 250 and any(code in (250, 251) for code, _ in replies[1:]):
+                replies.append(await self.command("DATA"))
+
+        mail_reply, rcpt_replies = replies[0], replies[1 : len(commands)]
+        data_reply = replies[len(commands)] if len(replies) > len(commands) else None
+        if mail_reply[0] != 250:
+            await self._reset(data_reply)
+            raise smtplib.SMTPSenderRefused(mail_reply[0], mail_reply[1], from_addr)
+        refused = {
+            address: reply
+            for address, reply in zip(to_addrs, rcpt_replies)
+            if reply[0] not in (250, 251)
+        }
+        if len(refused) == len(to_addrs):
+            await self._reset(data_reply)
+            raise smtplib.SMTPRecipientsRefused(refused)
+        if data_reply is None or data_reply[0] != 354:
+            code, text = data_reply or (-1, "DATA not sent")
+            await self._reset(data_reply)
+            raise smtplib.SMTPDataError(code, text)
+
+        await self._write(data)
+        code, text = await self._read_reply()
+        if code != 250:
+            await self.command("RSET")
+            raise smtplib.SMTPDataError(code, text)
+        self.messages += 1
+        self.last_used = time.monotonic()
+        return refused
+
+    async def _reset(self, data_reply: Optional[tuple[int, str]]) -> None:
+        if data_reply is not None and data_reply[0] == 354:
+            # The server accepted a pipelined DATA: end it with an empty message, then reset
+            await self._write(b".\r\n")
+            await self._read_reply()
+        await self.command("RSET")
+
+    async def noop(self) -> bool:
+        try:
+            return (await self.command("NOOP"))[0] == 250
+        except (smtplib.SMTPException, OSError, asyncio.TimeoutError):
+            return False
+
+    async def quit(self) -> None:
+        try:
+            await self.command("QUIT")
+        except (smtplib.SMTPException, OSError, asyncio.TimeoutError):
+            pass
+        self.close()
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+
+class AsyncSMTPSession:
+    """One checked-out connection for a run of messages (see AsyncSMTPPool.session)."""
+
+    def __init__(self, pool: "AsyncSMTPPool"):
+        self._pool = pool
+        self._conn: Optional[AsyncSMTPConnection] = None
+
+    async def send_message(self, msg: Message) -> dict[str, tuple[int, str]]:
+        while True:
+            if self._conn is None:
+                self._conn = await self._pool._checkout()
+            conn = self._conn
+            reused = conn.messages > 0
+            try:
+                refused = await conn.send_message(msg)
+            except CONNECTION_ERRORS as e:
+                await self._pool._discard(conn)
+                self._conn = None
+                # A kept-alive connection may have been closed by the server since the last
+                # health check: retry once on a fresh one. A fresh connection failing is real.
+                if not reused:
+                    raise
+                logger.info(f"Async SMTP pool: connection lost ({e!r}); reconnecting.")
+                continue
+            except smtplib.SMTPException:
+                raise  # Refused by the server; the transaction was reset, connection reusable
+            except BaseException:
+                self._pool._drop(conn)  # E.g. cancelled mid-transaction: state unknown
+                self._conn = None
+                raise
+            if conn.messages >= self._pool.max_messages:
+                await self._pool._discard(conn)
+                self._conn = None
+            return refused
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._pool._checkin(self._conn)
+            self._conn = None
+
+
+class AsyncSMTPPool:
+    """
+    Multiplexes concurrent sends over at most `max_size` AsyncSMTPConnections. Callers
+    beyond that wait on a semaphore (no threads are held while waiting). Same keep-alive,
+    NOOP health-check and message-limit rules as app.services.smtp_pool.
+
+    Connections belong to the event loop that opened them; if the pool is used from a
+    different loop (e.g. a task calling asyncio.run), the old connections are dropped and
+    a new semaphore is started. Connections still checked out on the old loop are closed
+    when returned, without releasing a slot of the new semaphore.
+    """
+
+    def __init__(
+        self,
+        *,
+        host: Optional[str],
+        port: Optional[int],
+        user: Optional[str],
+        password: Optional[str],
+        use_tls: bool,
+        timeout: float,
+        max_size: int,
+        max_messages: int,
+        idle_timeout: float,
+        noop_after: float,
+        ssl_context: Optional[ssl.SSLContext] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.max_size = max_size
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.noop_after = noop_after
+        self.ssl_context = ssl_context
+        self._idle: list[AsyncSMTPConnection] = []  # LIFO: most recently used first
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _bind_loop(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            for conn in self._idle:  # Their transports belong to the previous loop
+                self._close_stale(conn)
+            self._idle = []
+            self._slots = asyncio.Semaphore(self.max_size)
+            self._loop = loop
+        return self._slots
+
+    async def _connect(self) -> AsyncSMTPConnection:
+        conn = AsyncSMTPConnection(
+            host=self.host,
+            port=self.port,
+            user=self.user,
+            password=self.password,
+            use_tls=self.use_tls,
+            timeout=self.timeout,
+            ssl_context=self.ssl_context,
+        )
+        await conn.connect()
+        return conn
+
+    async def _is_usable(self, conn: AsyncSMTPConnection) -> bool:
+        idle_for = time.monotonic() - conn.last_used
+        if idle_for > self.idle_timeout:
+            return False
+        if idle_for > self.noop_after:
+            return await conn.noop()
+        return True
+
+    async def _checkout(self) -> AsyncSMTPConnection:
+        slots = self._bind_loop()
+        await slots.acquire()
+        try:
+            while self._idle:
+                conn = self._idle.pop()
+                if await self._is_usable(conn):
+                    return conn
+                await conn.quit()
+            return await self._connect()
+        except BaseException:
+            slots.release()
+            raise
+
+    def _owns(self, conn: AsyncSMTPConnection) -> bool:
+        """False for a connection checked out before the pool moved to another loop."""
+        return conn.loop is self._loop
+
+    @staticmethod
+    def _close_stale(conn: AsyncSMTPConnection) -> None:
+        try:
+            conn.close()
+        except RuntimeError:  # Its loop is already closed
+            pass
+
+    def _checkin(self, conn: AsyncSMTPConnection) -> None:
+        if not self._owns(conn):
+            self._close_stale(conn)
+            return
+        self._idle.append(conn)
+        self._slots.release()
+
+    async def _discard(self, conn: AsyncSMTPConnection) -> None:
+        if self._owns(conn):
+            self._slots.release()
+        await conn.quit()
+
+    def _drop(self, conn: AsyncSMTPConnection) -> None:
+        if self._owns(conn):
+            self._slots.release()
+        conn.close()
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[AsyncSMTPSession]:
+        """Holds one pooled connection for several messages (e.g. a chunk of a mailing)."""
+        session = AsyncSMTPSession(self)
+        try:
+            yield session
+        finally:
+            session.close()
+
+    async def send_message(self, msg: Message) -> dict[str, tuple[int, str]]:
+        async with self.session() as session:
+            return await session.send_message(msg)
+
+    async def close(self) -> None:
+        """Closes all idle connections, e.g. at shutdown."""
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            await conn.quit()
+
+
+async_smtp_pool = AsyncSMTPPool(
+    host=settings.SMTP_HOST,
+    port=settings.SMTP_PORT,
+    user=settings.SMTP_USER,
+    password=settings.SMTP_PASSWORD,
+    use_tls=settings.SMTP_TLS,
+    timeout=settings.SMTP_TIMEOUT_SECONDS,
+    max_size=settings.SMTP_POOL_SIZE,
+    max_messages=settings.SMTP_POOL_MAX_MESSAGES_PER_CONNECTION,
+    idle_timeout=settings.SMTP_POOL_IDLE_TIMEOUT_SECONDS,
+    noop_after=settings.SMTP_POOL_NOOP_AFTER_SECONDS,
+)
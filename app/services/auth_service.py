@@ -1,27 +1,40 @@
 # app/services/auth_service.py
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status, Request, Response
-from jose import jwt, JWTError
+from jose import JWTError
 
 from app.db.schemas import user_schemas, token_schemas
 from app.repositories.user_repository import UserRepository
 from app.core.security import (
-    verify_password,
-    create_access_token,
+    verify_password_async,
+    issue_access_token,
+    issue_refresh_token,
     create_refresh_token,
     set_auth_cookies,
     clear_auth_cookies,
 )
 from app.db.models.user_model import User
 from app.services.user_service import user_service
-from app.core.config import settings
-from datetime import datetime, timezone  # <--- UNCOMMENT OR ADD THIS
+from app.core.activity_recorder import activity_recorder
+from app.core.jwt_cache import verified_tokens
+from app.core.refresh_tokens import REUSED, REVOKED, ROTATED, UNAVAILABLE, refresh_tokens
+from app.core.user_cache import user_from_cache
 
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 
 
+def _refresh_unavailable() -> HTTPException:
+    # Redis is down: the token cannot be consumed, so nothing is issued for it
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Could not refresh the session right now. Please try again.",
+        headers={"Retry-After": "5"},
+    )
+
+
 class AuthService:
     async def login_web(
         self, db: AsyncSession, *, form_data: user_schemas.UserLoginSchema
@@ -42,20 +55,18 @@ class AuthService:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Your account is inactive.",
             )
-        if not verify_password(form_data.password, user.hashed_password):
+        if not await verify_password_async(form_data.password, user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email/username or password.",
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        # Update last_login_at timestamp
-        user.last_login_at = datetime.now(timezone.utc)
-        db.add(user)  # Ensure the change is tracked by the session
-        # The commit will be handled by the get_async_db dependency wrapper
+        # Buffered and written in batches; no UPDATE on the users row here
+        await activity_recorder.record(user.id)
 
-        access_token = create_access_token(data={"sub": user.username, "user_id": user.id})
-        refresh_token = create_refresh_token(data={"sub": user.username, "user_id": user.id})
+        access_token = await issue_access_token(user)
+        refresh_token = await issue_refresh_token(user)
 
         return user, access_token, refresh_token
 
@@ -76,6 +87,16 @@ class AuthService:
                 detail="An unexpected error occurred during registration.",
             )
 
+    @staticmethod
+    def _check_refresh_user(user: User | None, username: str) -> None:
+        if not user or user.username != username:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found or token mismatch",
+            )
+        if not user.is_active:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User is inactive")
+
     async def refresh_access_token_web(
         self,
         request: Request,
@@ -87,11 +108,7 @@ class AuthService:
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token missing"
             )
         try:
-            payload = jwt.decode(
-                refresh_token_from_cookie,
-                settings.SECRET_KEY,
-                algorithms=[settings.ALGORITHM],
-            )
+            payload = verified_tokens.decode(refresh_token_from_cookie)
             if payload.get("type") != "refresh":
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -104,27 +121,58 @@ class AuthService:
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Invalid refresh token payload",
                 )
-            user_repo = UserRepository(db_session=db)
-            user = await user_repo.get_by_id(user_id=user_id)
-            if not user or user.username != username:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="User not found or token mismatch",
-                )
-            if not user.is_active:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST, detail="User is inactive"
-                )
 
-            # Optionally, update last_login_at on token refresh as well,
-            # as it indicates activity.
-            user.last_login_at = datetime.now(timezone.utc)
-            db.add(user)
+            # Hot path: one atomic Redis call rotates the token and returns the user snapshot
+            family_id, jti = payload.get("fid"), payload.get("jti")
+            if family_id and jti:
+                new_jti = uuid.uuid4().hex
+                rotation = await refresh_tokens.rotate(family_id, jti, new_jti, user_id)
+                if rotation.outcome == REUSED:
+                    raise HTTPException(
+                        status_code=status.HTTP_401_UNAUTHORIZED,
+                        detail="Refresh token reuse detected. Please log in again.",
+                    )
+                if rotation.outcome == REVOKED:
+                    raise HTTPException(
+                        status_code=status.HTTP_401_UNAUTHORIZED,
+                        detail="Refresh token has been revoked",
+                    )
+                if rotation.outcome == ROTATED:
+                    user = user_from_cache(rotation.user_data)
+                    self._check_refresh_user(user, username)
+                    await activity_recorder.record(user_id)
+                    new_access_token = await issue_access_token(user)
+                    new_refresh_token = create_refresh_token(
+                        data={
+                            "sub": username,
+                            "user_id": user_id,
+                            "fid": family_id,
+                            "jti": new_jti,
+                        }
+                    )
+                    return new_access_token, new_refresh_token
+                # UNAVAILABLE: issuing a new family here would leave this token's family
+                # alive next to it and defeat reuse detection
+                raise _refresh_unavailable()
 
-            new_access_token = create_access_token(data={"sub": user.username, "user_id": user.id})
-            new_refresh_token = create_refresh_token(
-                data={"sub": user.username, "user_id": user.id}
+            # Untracked token (issued while Redis was down): usable once, like a tracked one;
+            # then verified against Postgres and moved into a new family
+            outcome = await refresh_tokens.consume_untracked(
+                refresh_token_from_cookie, payload["exp"]
             )
+            if outcome == REUSED:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Refresh token has already been used. Please log in again.",
+                )
+            if outcome == UNAVAILABLE:
+                raise _refresh_unavailable()
+            user_repo = UserRepository(db_session=db)
+            user = await user_repo.get_by_id(user_id=user_id)
+            self._check_refresh_user(user, username)
+            await activity_recorder.record(user_id)
+            new_access_token = await issue_access_token(user)
+            new_refresh_token = await issue_refresh_token(user)
             return new_access_token, new_refresh_token
         except JWTError:
             raise HTTPException(
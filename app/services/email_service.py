@@ -4,30 +4,55 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import logging
+from email.message import Message
+from typing import Any, Optional
 
 from app.core.config import settings
+from app.services.email_templates import get_email_template, html_to_text
+from app.services.async_smtp import async_smtp_pool
+from app.services.smtp_pool import smtp_pool
 
 logger = logging.getLogger(__name__)
 
 
-def _send_email_blocking(
-    smtp_server: str,
-    smtp_port: int,
-    msg: MIMEMultipart,
-    smtp_user: str | None,
-    smtp_password: str | None,
-    use_tls: bool,
-):
-    """
-    Blocking helper function to send email.
-    This function is intended to be run in a separate thread.
-    """
-    with smtplib.SMTP(smtp_server, smtp_port, timeout=10) as server:  # Added timeout
-        if use_tls:
-            server.starttls()
-        if smtp_user and smtp_password:
-            server.login(smtp_user, smtp_password)
-        server.send_message(msg)
+def _smtp_configured() -> bool:
+    return all(
+        [
+            settings.SMTP_HOST,
+            settings.SMTP_PORT,
+            settings.SMTP_USER,
+            # settings.SMTP_PASSWORD, # Password can be None for some local SMTP servers
+            settings.EMAILS_FROM_EMAIL,
+        ]
+    )
+
+
+def _build_message(
+    to_email: str, subject: str, html_content: str, text_content: str | None
+) -> MIMEMultipart:
+    # Construct From header
+    from_header = settings.EMAILS_FROM_EMAIL
+    if settings.EMAILS_FROM_NAME:
+        from_header = f"{settings.EMAILS_FROM_NAME} <{settings.EMAILS_FROM_EMAIL}>"
+
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["From"] = from_header
+    msg["To"] = to_email
+
+    # Attach plain text part first, then HTML part
+    if text_content:
+        part1 = MIMEText(text_content, "plain", "utf-8")
+        msg.attach(part1)
+    else:
+        # Fallback for raw HTML callers; email templates (app.services.email_templates)
+        # always provide a text part, built once per template instead of per message.
+        part1 = MIMEText(html_to_text(html_content), "plain", "utf-8")
+        msg.attach(part1)
+
+    part2 = MIMEText(html_content, "html", "utf-8")
+    msg.attach(part2)
+    return msg
 
 
 async def send_email_async(
@@ -44,20 +69,12 @@ async def send_email_async(
         subject: The subject of the email.
         html_content: The HTML content of the email.
         text_content: Optional plain text content of the email. If not provided,
-        a simple text version might be derived or skipped.
+        it is derived from the HTML.
 
     Returns:
         True if the email was sent successfully (or simulated in dev), False otherwise.
     """
-    if not all(
-        [
-            settings.SMTP_HOST,
-            settings.SMTP_PORT,
-            settings.SMTP_USER,
-            # settings.SMTP_PASSWORD, # Password can be None for some local SMTP servers
-            settings.EMAILS_FROM_EMAIL,
-        ]
-    ):
+    if not _smtp_configured():
         logger.warning(
             "SMTP settings (SMTP_HOST, SMTP_PORT, SMTP_USER, EMAILS_FROM_EMAIL) "
             "are not fully configured. Email sending skipped."
@@ -69,43 +86,16 @@ async def send_email_async(
             return True  # Simulate success in dev if not configured for actual sending
         return False
 
-    # Construct From header
-    from_header = settings.EMAILS_FROM_EMAIL
-    if settings.EMAILS_FROM_NAME:
-        from_header = f"{settings.EMAILS_FROM_NAME} <{settings.EMAILS_FROM_EMAIL}>"
-
-    msg = MIMEMultipart("alternative")
-    msg["Subject"] = subject
-    msg["From"] = from_header
-    msg["To"] = to_email
-
-    # Attach plain text part first, then HTML part
-    if text_content:
-        part1 = MIMEText(text_content, "plain", "utf-8")
-        msg.attach(part1)
-    else:
-        # Fallback plain text if not provided (simple extraction, can be improved)
-        # For robustness, it's better to always provide explicit text_content
-        import re
-
-        fallback_text = re.sub("<[^<]+?>", "", html_content)  # Basic HTML strip
-        part1 = MIMEText(fallback_text[:500], "plain", "utf-8")  # Limit length
-        msg.attach(part1)
-
-    part2 = MIMEText(html_content, "html", "utf-8")
-    msg.attach(part2)
+    msg = _build_message(to_email, subject, html_content, text_content)
 
     try:
-        # smtplib is blocking, so run it in a separate thread using asyncio.to_thread
-        await asyncio.to_thread(
-            _send_email_blocking,
-            settings.SMTP_HOST,
-            settings.SMTP_PORT,
-            msg,
-            settings.SMTP_USER,
-            settings.SMTP_PASSWORD,
-            settings.SMTP_TLS,
-        )
+        if settings.SMTP_ASYNC_TRANSPORT:
+            # Concurrent sends share a few pooled connections without holding threads
+            await async_smtp_pool.send_message(msg)
+        else:
+            # smtplib is blocking, so run it in a separate thread using asyncio.to_thread.
+            # The pool reuses authenticated connections across emails (and across tasks).
+            await asyncio.to_thread(smtp_pool.send_message, msg)
         logger.info(f"Email sent successfully to {to_email} with subject: {subject}")
         return True
     except smtplib.SMTPException as e:
@@ -113,3 +103,93 @@ async def send_email_async(
     except Exception as e:
         logger.error(f"Unexpected error sending email to {to_email}: {e}", exc_info=True)
     return False
+
+
+def _send_batch_blocking(messages: list[Message]) -> list[Optional[Exception]]:
+    errors: list[Optional[Exception]] = []
+    with smtp_pool.session() as session:
+        for msg in messages:
+            try:
+                session.send_message(msg)
+                errors.append(None)
+            except Exception as e:
+                errors.append(e)
+    return errors
+
+
+async def send_messages_async(messages: list[Message]) -> list[Optional[Exception]]:
+    """
+    Sends `messages` one after another over a single pooled SMTP session.
+    Returns, per message, None on success or the exception it failed with.
+    """
+    if not settings.SMTP_ASYNC_TRANSPORT:
+        return await asyncio.to_thread(_send_batch_blocking, messages)
+    errors: list[Optional[Exception]] = []
+    async with async_smtp_pool.session() as session:
+        for msg in messages:
+            try:
+                await session.send_message(msg)
+                errors.append(None)
+            except Exception as e:
+                errors.append(e)
+    return errors
+
+
+async def send_bulk_email_async(
+    recipients: list[dict[str, Any]],
+    template_id: str,
+    context: dict[str, Any] | None = None,
+    *,
+    chunk_size: int | None = None,
+) -> dict[str, Exception]:
+    """
+    Renders one compiled email template per recipient and sends the mails in chunks, each
+    chunk over its own SMTP session (at most SMTP_POOL_SIZE chunks at a time). Messages
+    are built per chunk, right before it is sent, so only the chunks in flight are held
+    in memory.
+
+    Args:
+        recipients: One dict per recipient with at least "email"; its other keys are
+        template variables for that recipient (e.g. "name").
+        template_id: Email template to render (see app.services.email_templates).
+        context: Template variables shared by all recipients.
+
+    Returns:
+        The recipients that failed: {email: the exception it failed with}.
+    """
+    template = get_email_template(template_id)
+    chunk_size = chunk_size or settings.EMAIL_BULK_CHUNK_SIZE
+
+    if not _smtp_configured():
+        logger.warning(f"SMTP is not fully configured. Bulk email '{template_id}' skipped.")
+        if settings.ENVIRONMENT == "development":
+            logger.info(f"DEV MODE: Bulk email simulation for {len(recipients)} recipients.")
+            return {}
+        error = smtplib.SMTPException("SMTP is not configured.")
+        return {recipient["email"]: error for recipient in recipients}
+
+    failures: dict[str, Exception] = {}
+    chunk_starts = iter(range(0, len(recipients), chunk_size))
+
+    async def send_chunks() -> None:
+        # Workers share one iterator: each takes the next chunk once its previous one is sent
+        for start in chunk_starts:
+            chunk = recipients[start : start + chunk_size]
+            messages = []
+            for recipient in chunk:
+                rendered = template.render({**(context or {}), **recipient})
+                messages.append(
+                    _build_message(
+                        recipient["email"], rendered.subject, rendered.html, rendered.text
+                    )
+                )
+            errors = await send_messages_async(messages)
+            for recipient, error in zip(chunk, errors):
+                if error is not None:
+                    failures[recipient["email"]] = error
+
+    # No more chunks in flight than pooled connections: extra chunks would only wait for a
+    # connection (and time out on the threaded pool), failing messages spuriously
+    workers = min(settings.SMTP_POOL_SIZE, -(-len(recipients) // chunk_size))
+    await asyncio.gather(*(send_chunks() for _ in range(workers)))
+    return failures
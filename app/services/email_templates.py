@@ -0,0 +1,259 @@
+# app/services/email_templates.py
+import datetime
+import html
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+from jinja2 import (
+    Environment,
+    FileSystemLoader,
+    Template,
+    TemplateNotFound,
+    select_autoescape,
+)
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+EMAIL_TEMPLATES_DIR = os.path.join(settings.TEMPLATES_DIR, "emails")
+# Inlined into every .html email template when it is compiled (see EmailTemplateLoader)
+EMAIL_STYLESHEET = "email.css"
+
+# Jinja syntax is swapped for placeholders while HTML is rewritten, so it survives intact
+_JINJA_SYNTAX = re.compile(r"\{\{.*?\}\}|\{%.*?%\}|\{#.*?#\}", re.DOTALL)
+_PLACEHOLDER = re.compile(r"\x00(\d+)\x00")
+_TEMPLATE_REFERENCE = re.compile(
+    r"""(\{%-?\s*(?:extends|include|import|from)\s+["'][^"']+)\.html(["'])"""
+)
+
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_CSS_RULE = re.compile(r"([^{}]+)\{([^{}]*)\}")
+_CSS_SELECTOR = re.compile(r"^([a-zA-Z][a-zA-Z0-9]*)?(?:\.([\w-]+))?$")
+_OPENING_TAG = re.compile(r"<([a-zA-Z][a-zA-Z0-9]*)(\s[^<>]*?)?(\s*/?)>")
+_CLASS_ATTR = re.compile(r"""\sclass\s*=\s*["']([^"']*)["']""")
+_STYLE_ATTR = re.compile(r"""\sstyle\s*=\s*["']([^"']*)["']""")
+_NOT_RENDERED = ("head", "html", "meta", "title", "style", "link", "script")
+
+_INVISIBLE = re.compile(
+    r"<!--.*?-->|<!DOCTYPE[^>]*>|<(head|style|script)\b.*?</\1>", re.DOTALL | re.I
+)
+_LINK = re.compile(r"""<a\s[^>]*?href\s*=\s*["']([^"']*)["'][^>]*>(.*?)</a>""", re.DOTALL | re.I)
+_LINE_BREAK = re.compile(r"<br\s*/?>", re.I)
+_LIST_ITEM = re.compile(r"<li\b[^>]*>", re.I)
+_BLOCK_END = re.compile(r"</(p|div|h[1-6]|ul|ol|table|tr|blockquote)>", re.I)
+_TAG = re.compile(r"<[^>]+>")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def _protect_jinja(source: str) -> tuple[str, Callable[[str], str]]:
+    segments: list[str] = []
+
+    def hide(match: re.Match) -> str:
+        segments.append(match.group(0))
+        return f"\x00{len(segments) - 1}\x00"
+
+    def restore(text: str) -> str:
+        return _PLACEHOLDER.sub(lambda match: segments[int(match.group(1))], text)
+
+    return _JINJA_SYNTAX.sub(hide, source), restore
+
+
+# --- CSS inlining (mail clients ignore or strip <style> blocks) ---
+@dataclass
+class CSSRule:
+    tag: Optional[str]
+    css_class: Optional[str]
+    declarations: dict[str, str]
+    specificity: tuple[int, int]
+    order: int
+
+    def matches(self, tag: str, classes: set[str]) -> bool:
+        return (self.tag is None or self.tag == tag) and (
+            self.css_class is None or self.css_class in classes
+        )
+
+
+def parse_stylesheet(css: str) -> list[CSSRule]:
+    """Rules with `tag`, `.class` or `tag.class` selectors; anything else is skipped."""
+    rules: list[CSSRule] = []
+    for selectors, body in _CSS_RULE.findall(_CSS_COMMENT.sub("", css)):
+        declarations = {}
+        for declaration in body.split(";"):
+            name, _, value = declaration.partition(":")
+            if name.strip() and value.strip():
+                declarations[name.strip().lower()] = value.strip().replace('"', "'")
+        for selector in selectors.split(","):
+            match = _CSS_SELECTOR.match(selector.strip())
+            if not match or not any(match.groups()):
+                logger.warning(f"Email CSS: selector '{selector.strip()}' cannot be inlined.")
+                continue
+            tag, css_class = match.group(1), match.group(2)
+            specificity = (1 if css_class else 0, 1 if tag else 0)
+            rules.append(
+                CSSRule(tag and tag.lower(), css_class, declarations, specificity, len(rules))
+            )
+    return rules
+
+
+def inline_css(source: str, rules: list[CSSRule]) -> str:
+    """Writes matching rules into each tag's style attribute; existing inline styles win."""
+    protected, restore = _protect_jinja(source)
+
+    def inline(match: re.Match) -> str:
+        tag, attributes, closing = match.group(1).lower(), match.group(2) or "", match.group(3)
+        if tag in _NOT_RENDERED:
+            return match.group(0)
+        class_attr = _CLASS_ATTR.search(attributes)
+        classes = set(class_attr.group(1).split()) if class_attr else set()
+        declarations: dict[str, str] = {}
+        matching = [rule for rule in rules if rule.matches(tag, classes)]
+        for rule in sorted(matching, key=lambda rule: (rule.specificity, rule.order)):
+            declarations.update(rule.declarations)
+        style_attr = _STYLE_ATTR.search(attributes)
+        if style_attr:
+            declarations.update(parse_stylesheet(f"x{{{style_attr.group(1)}}}")[0].declarations)
+            attributes = attributes[: style_attr.start()] + attributes[style_attr.end() :]
+        if not declarations:
+            return match.group(0)
+        style = "; ".join(f"{name}: {value}" for name, value in declarations.items())
+        return f'<{match.group(1)}{attributes} style="{style}"{closing}>'
+
+    return restore(_OPENING_TAG.sub(inline, protected))
+
+
+# --- Plain-text parts ---
+def html_to_text(source: str) -> str:
+    """
+    Plain-text version of an HTML email: links become "label (url)", block elements
+    become line breaks, tags are dropped. Jinja syntax in `source` is kept, so this can
+    turn an HTML template into a text template.
+    """
+    text, restore = _protect_jinja(source)
+    text = _INVISIBLE.sub("", text)
+
+    def link(match: re.Match) -> str:
+        url, label = match.group(1), _TAG.sub("", match.group(2)).strip()
+        return url if restore(label) in ("", restore(url)) else f"{label} ({url})"
+
+    text = _LINK.sub(link, text)
+    text = _LINE_BREAK.sub("\n", text)
+    text = _LIST_ITEM.sub("\n- ", text)
+    text = _BLOCK_END.sub("\n\n", text)
+    text = html.unescape(_TAG.sub("", text))
+    lines = [line.strip() for line in text.splitlines()]
+    text = _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip() + "\n"
+    return restore(text)
+
+
+class EmailTemplateLoader(FileSystemLoader):
+    """
+    The build step between the template files and Jinja's compiler. It runs once per
+    template, when the template is first compiled, never per email:
+    - `.html` templates get EMAIL_STYLESHEET inlined into their tags' style attributes;
+    - a `.txt` template that does not exist is derived from the `.html` template of the
+      same name (references to other `.html` templates become `.txt`).
+    """
+
+    def __init__(self, searchpath: str):
+        super().__init__(searchpath)
+        self._rules: Optional[list[CSSRule]] = None
+
+    def _stylesheet(self, environment: Environment) -> list[CSSRule]:
+        if self._rules is None:
+            try:
+                css = super().get_source(environment, EMAIL_STYLESHEET)[0]
+            except TemplateNotFound:
+                css = ""
+            self._rules = parse_stylesheet(css)
+        return self._rules
+
+    def get_source(self, environment: Environment, template: str):
+        if template.endswith(".txt"):
+            try:
+                return super().get_source(environment, template)
+            except TemplateNotFound:
+                try:
+                    source, filename, uptodate = super().get_source(
+                        environment, f"{template[:-4]}.html"
+                    )
+                except TemplateNotFound as e:
+                    raise TemplateNotFound(template) from e
+                source = _TEMPLATE_REFERENCE.sub(r"\1.txt\2", source)
+                return html_to_text(source), filename, uptodate
+        source, filename, uptodate = super().get_source(environment, template)
+        if template.endswith(".html"):
+            source = inline_css(source, self._stylesheet(environment))
+        return source, filename, uptodate
+
+
+# Synchronous environment (emails are rendered in Celery workers as well as in the app).
+# Templates never change at runtime, so compiled templates are cached for the process.
+email_env = Environment(
+    loader=EmailTemplateLoader(EMAIL_TEMPLATES_DIR),
+    autoescape=select_autoescape(["html"]),
+    auto_reload=False,
+    trim_blocks=True,
+    lstrip_blocks=True,
+)
+email_env.globals["settings"] = settings
+
+
+@dataclass
+class RenderedEmail:
+    subject: str
+    html: str
+    text: str
+
+
+class EmailTemplate:
+    """
+    An email identified by `template_id`, made of files in EMAIL_TEMPLATES_DIR:
+    `<id>.subject.txt`, `<id>.html` and optionally `<id>.txt` (the plain-text part,
+    derived from the HTML one when missing).
+    """
+
+    def __init__(self, template_id: str):
+        self.template_id = template_id
+        self.subject: Template = email_env.get_template(f"{template_id}.subject.txt")
+        self.html: Template = email_env.get_template(f"{template_id}.html")
+        self.text: Template = email_env.get_template(f"{template_id}.txt")
+
+    def render(self, context: dict[str, Any]) -> RenderedEmail:
+        context = {"current_year": datetime.date.today().year, **context}
+        return RenderedEmail(
+            subject=self.subject.render(context).strip(),
+            html=self.html.render(context),
+            text=self.text.render(context),
+        )
+
+
+@lru_cache(maxsize=None)
+def get_email_template(template_id: str) -> EmailTemplate:
+    """Compiled once per process; raises jinja2.TemplateNotFound for unknown ids."""
+    return EmailTemplate(template_id)
+
+
+def precompile_email_templates() -> dict[str, float]:
+    """
+    Compiles every email template (every `<id>.subject.txt`) up front, so the first email
+    after a deploy or worker start doesn't pay the build and compile cost.
+    Returns the build time in milliseconds per template id.
+    """
+    timings: dict[str, float] = {}
+    for name in email_env.list_templates(filter_func=lambda name: name.endswith(".subject.txt")):
+        template_id = name[: -len(".subject.txt")]
+        started = time.perf_counter()
+        try:
+            get_email_template(template_id)
+        except Exception as e:
+            logger.error(f"Email template precompilation failed for {template_id}: {e}")
+            continue
+        timings[template_id] = (time.perf_counter() - started) * 1000
+    logger.info(f"Precompiled {len(timings)} email templates in {sum(timings.values()):.1f} ms.")
+    return timings
@@ -0,0 +1,192 @@
+# app/services/smtp_pool.py
+import logging
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from email.message import Message
+from typing import Iterator, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean the connection itself is gone (as opposed to e.g. a refused recipient)
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class _PooledConnection:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.messages = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPSession:
+    """
+    One checked-out SMTP connection, used for a run of messages (see SMTPConnectionPool.session).
+    Transparently reconnects when the server dropped an idle connection or the
+    per-connection message limit is reached.
+    """
+
+    def __init__(self, pool: "SMTPConnectionPool"):
+        self._pool = pool
+        self._conn: Optional[_PooledConnection] = None
+
+    def send_message(self, msg: Message) -> None:
+        while True:
+            if self._conn is None:
+                self._conn = self._pool._checkout()
+            conn = self._conn
+            reused = conn.messages > 0
+            try:
+                conn.smtp.send_message(msg)
+            except CONNECTION_ERRORS as e:
+                self._pool._discard(conn)
+                self._conn = None
+                # A kept-alive connection may have been closed by the server since the last
+                # health check: retry once on a fresh one. A fresh connection failing is real.
+                if not reused:
+                    raise
+                logger.info(f"SMTP pool: connection lost ({e}); reconnecting.")
+                continue
+            conn.messages += 1
+            conn.last_used = time.monotonic()
+            if conn.messages >= self._pool.max_messages:
+                self._pool._discard(conn)
+                self._conn = None
+            return
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._pool._checkin(self._conn)
+            self._conn = None
+
+
+class SMTPConnectionPool:
+    """
+    Thread-safe pool of authenticated smtplib connections.
+
+    - At most `max_size` connections exist at once; callers beyond that wait up to `timeout`.
+    - Idle connections are kept alive and reused (no TCP/TLS handshake or AUTH per email).
+      One idle for more than `noop_after` seconds is health-checked with NOOP before reuse;
+      one idle for more than `idle_timeout` seconds is closed instead (servers drop them).
+    - A connection is retired after `max_messages` messages.
+    """
+
+    def __init__(
+        self,
+        *,
+        host: Optional[str],
+        port: Optional[int],
+        user: Optional[str],
+        password: Optional[str],
+        use_tls: bool,
+        timeout: float,
+        max_size: int,
+        max_messages: int,
+        idle_timeout: float,
+        noop_after: float,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.max_size = max_size
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.noop_after = noop_after
+        self._idle: list[_PooledConnection] = []  # LIFO: most recently used first
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def _connect(self) -> _PooledConnection:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                smtp.starttls()
+            if self.user and self.password:
+                smtp.login(self.user, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        return _PooledConnection(smtp)
+
+    def _is_usable(self, conn: _PooledConnection) -> bool:
+        idle_for = time.monotonic() - conn.last_used
+        if idle_for > self.idle_timeout:
+            return False
+        if idle_for > self.noop_after:
+            try:
+                return conn.smtp.noop()[0] == 250
+            except (smtplib.SMTPException, OSError):
+                return False
+        return True
+
+    def _checkout(self) -> _PooledConnection:
+        if not self._slots.acquire(timeout=self.timeout):
+            raise smtplib.SMTPException("SMTP connection pool exhausted.")
+        try:
+            while True:
+                with self._lock:
+                    conn = self._idle.pop() if self._idle else None
+                if conn is None:
+                    return self._connect()
+                if self._is_usable(conn):
+                    return conn
+                self._close(conn)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _checkin(self, conn: _PooledConnection) -> None:
+        with self._lock:
+            self._idle.append(conn)
+        self._slots.release()
+
+    def _discard(self, conn: _PooledConnection) -> None:
+        self._close(conn)
+        self._slots.release()
+
+    @staticmethod
+    def _close(conn: _PooledConnection) -> None:
+        try:
+            conn.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            conn.smtp.close()
+
+    @contextmanager
+    def session(self) -> Iterator[SMTPSession]:
+        """Holds one pooled connection for several messages (e.g. a chunk of a mailing)."""
+        session = SMTPSession(self)
+        try:
+            yield session
+        finally:
+            session.close()
+
+    def send_message(self, msg: Message) -> None:
+        with self.session() as session:
+            session.send_message(msg)
+
+    def close(self) -> None:
+        """Closes all idle connections, e.g. at shutdown."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._close(conn)
+
+
+smtp_pool = SMTPConnectionPool(
+    host=settings.SMTP_HOST,
+    port=settings.SMTP_PORT,
+    user=settings.SMTP_USER,
+    password=settings.SMTP_PASSWORD,
+    use_tls=settings.SMTP_TLS,
+    timeout=settings.SMTP_TIMEOUT_SECONDS,
+    max_size=settings.SMTP_POOL_SIZE,
+    max_messages=settings.SMTP_POOL_MAX_MESSAGES_PER_CONNECTION,
+    idle_timeout=settings.SMTP_POOL_IDLE_TIMEOUT_SECONDS,
+    noop_after=settings.SMTP_POOL_NOOP_AFTER_SECONDS,
+)
@@ -0,0 +1,218 @@
+# app/services/smtp_standin.py
+import asyncio
+import smtplib
+from email.message import EmailMessage
+from typing import Iterable, Optional
+
+from app.services.async_smtp import AsyncSMTPPool
+
+_END_OF_DATA = b"\r\n.\r\n"
+
+
+class StandInSMTPServer:
+    """
+    Local SMTP server for exercising the async client without a real mail server.
+
+    - Advertises PIPELINING (unless `pipelining=False`) and accepts any AUTH.
+    - Refuses the recipients in `refuse` with 550.
+    - Records delivered messages, and the commands that arrived together in one read
+      (`batches`): a pipelined transaction shows up as one MAIL..DATA batch.
+    - `drop_connections()` closes every client connection, like a server dropping idle
+      keep-alive connections.
+
+    `python -m app.services.smtp_standin` runs the client checks below against it.
+    """
+
+    def __init__(self, *, refuse: Iterable[str] = (), pipelining: bool = True):
+        self.refuse = {address.lower() for address in refuse}
+        self.pipelining = pipelining
+        self.messages: list[tuple[str, list[str], bytes]] = []
+        self.batches: list[list[str]] = []
+        self.connections = 0
+        self.port: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: set[asyncio.StreamWriter] = set()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self.drop_connections()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def drop_connections(self) -> None:
+        for writer in list(self._writers):
+            writer.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self._writers.add(writer)
+        state: dict = {"sender": "", "recipients": [], "in_data": False}
+        buffer = b""
+        try:
+            writer.write(b"220 stand-in ESMTP\r\n")
+            await writer.drain()
+            while True:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    return
+                buffer += chunk
+                batch: list[str] = []
+                while True:
+                    if state["in_data"]:
+                        if buffer.startswith(b".\r\n"):
+                            body, buffer = b"", buffer[3:]
+                        elif _END_OF_DATA in buffer:
+                            body, _, buffer = buffer.partition(_END_OF_DATA)
+                        else:
+                            break
+                        writer.write(self._end_data(state, body))
+                        continue
+                    line, sep, rest = buffer.partition(b"\r\n")
+                    if not sep:
+                        break
+                    buffer = rest
+                    command = line.decode("utf-8", "replace")
+                    batch.append(command)
+                    reply = self._reply(state, command)
+                    writer.write(reply)
+                    if reply.startswith(b"221"):
+                        await writer.drain()
+                        return
+                if batch:
+                    self.batches.append(batch)
+                await writer.drain()
+        except ConnectionError:
+            return
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _reply(self, state: dict, command: str) -> bytes:
+        verb = command.split(" ", 1)[0].upper()
+        if verb == "EHLO":
+            features = ["PIPELINING"] if self.pipelining else []
+            lines = ["stand-in", *features, "AUTH PLAIN LOGIN"]
+            return "".join(
+                f"250{'-' if i < len(lines) - 1 else ' '}{line}\r\n"
+                for i, line in enumerate(lines)
+            ).encode()
+        if verb == "AUTH":
+            return b"235 Authenticated\r\n"
+        if verb == "MAIL":
+            state["sender"], state["recipients"] = _address(command), []
+            return b"250 OK\r\n"
+        if verb == "RCPT":
+            address = _address(command)
+            if address.lower() in self.refuse:
+                return b"550 No such user\r\n"
+            state["recipients"].append(address)
+            return b"250 OK\r\n"
+        if verb == "DATA":
+            if not state["recipients"]:
+                return b"554 No valid recipients\r\n"
+            state["in_data"] = True
+            return b"354 End data with <CR><LF>.<CR><LF>\r\n"
+        if verb in ("RSET", "NOOP"):
+            state["recipients"] = []
+            return b"250 OK\r\n"
+        if verb == "QUIT":
+            return b"221 Bye\r\n"
+        return b"502 Command not implemented\r\n"
+
+    def _end_data(self, state: dict, body: bytes) -> bytes:
+        state["in_data"] = False
+        if not body:  # The client aborted a pipelined DATA with an empty message
+            return b"250 OK\r\n"
+        self.messages.append((state["sender"], state["recipients"], body))
+        state["recipients"] = []
+        return b"250 Queued\r\n"
+
+
+def _address(command: str) -> str:
+    return command.partition("<")[2].partition(">")[0]
+
+
+def _message(*recipients: str) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = "sender@example.com"
+    msg["To"] = ", ".join(recipients)
+    msg["Subject"] = "Stand-in check"
+    msg.set_content("Hello.\n.leading dot\n")
+    return msg
+
+
+def _check(condition: bool, description: str) -> None:
+    if not condition:
+        raise AssertionError(description)
+    print(f"ok: {description}")
+
+
+async def run_checks() -> None:
+    """Pipelining, refused recipients and reconnect-once of AsyncSMTPPool."""
+    server = StandInSMTPServer(refuse=["refused@example.com"])
+    await server.start()
+    pool = AsyncSMTPPool(
+        host="127.0.0.1",
+        port=server.port,
+        user="user",
+        password="secret",
+        use_tls=False,
+        timeout=5,
+        max_size=2,
+        max_messages=100,
+        idle_timeout=60,
+        noop_after=60,
+    )
+    try:
+        recipients = ["a@example.com", "b@example.com", "c@example.com"]
+        await pool.send_message(_message(*recipients))
+        _check(
+            ["MAIL", "RCPT", "RCPT", "RCPT", "DATA"]
+            in ([c[:4] for c in b] for b in server.batches),
+            "MAIL, every RCPT and DATA are sent in one batch",
+        )
+        _check(
+            server.messages[-1][1] == recipients
+            and b"\r\n..leading dot" in server.messages[-1][2],
+            "the message is delivered to every recipient, dot-stuffed",
+        )
+
+        refused = await pool.send_message(_message("a@example.com", "refused@example.com"))
+        _check(
+            list(refused) == ["refused@example.com"] and refused["refused@example.com"][0] == 550,
+            "a refused recipient is reported and the others still get the message",
+        )
+        try:
+            await pool.send_message(_message("refused@example.com"))
+        except smtplib.SMTPRecipientsRefused:
+            all_refused = True
+        else:
+            all_refused = False
+        _check(all_refused, "all recipients refused raises SMTPRecipientsRefused")
+        await pool.send_message(_message("a@example.com"))
+        _check(server.connections == 1, "the connection is reused after refusals (RSET)")
+
+        server.drop_connections()
+        await asyncio.sleep(0.05)
+        await pool.send_message(_message("a@example.com"))
+        _check(server.connections == 2, "a dropped kept-alive connection is replaced once")
+
+        await server.stop()
+        try:
+            await pool.send_message(_message("a@example.com"))
+        except (OSError, smtplib.SMTPServerDisconnected):
+            fresh_failed = True
+        else:
+            fresh_failed = False
+        _check(fresh_failed, "a failing fresh connection is not retried")
+    finally:
+        await pool.close()
+        await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_checks())
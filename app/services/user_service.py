@@ -5,7 +5,7 @@ from typing import Optional  # <--- Added this import
 
 from app.db.schemas import user_schemas
 from app.repositories.user_repository import UserRepository
-from app.core.security import get_password_hash  # Ensure this utility exists and is imported
+from app.core.security import get_password_hash_async  # Ensure this utility exists and is imported
 from app.db.models.user_model import User  # For return type hint
 import logging
 
@@ -42,7 +42,7 @@ class UserService:
                 detail="Email already registered.",
             )
 
-        hashed_password = get_password_hash(user_in.password)
+        hashed_password = await get_password_hash_async(user_in.password)
 
         # Prepare data for repository, using the new schema
         user_create_internal = user_schemas.UserCreatePasswordHashing(
@@ -0,0 +1,106 @@
+# app/tasks/async_runtime.py
+import asyncio
+import logging
+import os
+import threading
+from typing import Any, Coroutine, Optional, TypeVar
+
+from app.db.database import async_engine
+from app.services.async_smtp import async_smtp_pool
+from app.services.smtp_pool import smtp_pool
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+async def _close_resources() -> None:
+    """Loop-bound resources the tasks reuse; closed on the loop that opened them."""
+    await async_smtp_pool.close()
+    await async_engine.dispose()
+
+
+async def _run_once(coro: Coroutine[Any, Any, T], timeout: Optional[float]) -> T:
+    try:
+        return await asyncio.wait_for(coro, timeout)
+    finally:
+        await _close_resources()  # Bound to this loop, which ends with the call
+
+
+class WorkerEventLoop:
+    """
+    One long-lived event loop per worker process, running in a background thread.
+
+    Tasks are synchronous, so they hand coroutines to this loop (see `run_async`) instead
+    of creating and tearing down a loop per task with asyncio.run. Because the loop
+    survives between tasks, loop-bound resources (DB connection pool, async SMTP
+    connections) are reused across tasks. Started by the worker_process_init signal
+    (prefork pool, see app.tasks.celery_app), or lazily on first use in the solo and
+    threads pools. With `persistent = False` (set for the eventlet pool, where a loop
+    thread does not mix with green threads) each call runs on its own loop instead.
+    """
+
+    def __init__(self):
+        self.persistent = True
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            # A forked child inherits the attributes but not the thread: start a new loop
+            if self._loop is not None and self._pid == os.getpid():
+                return self._loop
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run() -> None:
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            thread = threading.Thread(target=run, name="worker-event-loop", daemon=True)
+            thread.start()
+            ready.wait()
+            self._loop, self._thread, self._pid = loop, thread, os.getpid()
+            logger.info(f"Worker event loop started (pid {self._pid}).")
+            return loop
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+        if not self.persistent:
+            return asyncio.run(_run_once(coro, timeout))
+        loop = self.start()
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("run_async() called from the worker event loop; await instead.")
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()  # E.g. a task time limit: don't leave the coroutine running
+            raise
+
+    def stop(self, timeout: float = 10) -> None:
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or self._pid != os.getpid():
+                return
+            self._loop = self._thread = None
+        try:
+            asyncio.run_coroutine_threadsafe(_close_resources(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"Worker event loop: error closing resources: {e}")
+        smtp_pool.close()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        loop.close()
+        logger.info(f"Worker event loop stopped (pid {os.getpid()}).")
+
+
+worker_loop = WorkerEventLoop()
+
+
+def run_async(coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+    """Runs `coro` on this worker's event loop and returns its result (for sync task code)."""
+    return worker_loop.run(coro, timeout)
@@ -30,7 +30,10 @@ except Exception as e:
     print(f"WARNING: Error applying eventlet monkey patch: {e}")
 
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
 from app.core.config import settings
+from app.services.email_templates import precompile_email_templates
+from app.tasks.async_runtime import worker_loop
 
 # Ensure settings are loaded before Celery app is created
 celery_app = Celery(
@@ -54,6 +57,26 @@ celery_app.conf.update(
     # task_acks_late=True, # If you want tasks to be acknowledged after completion/failure
 )
 
+# One persistent event loop per worker process for the tasks' async code (run_async).
+# Prefork workers start it from worker_process_init; solo/threads pools start it on first
+# use. worker_process_init never fires under eventlet, and an asyncio loop thread does not
+# mix with green threads, so eventlet workers run each call on its own loop instead.
+if worker_pool_is_eventlet:
+    worker_loop.persistent = False
+
+
+@worker_process_init.connect
+def start_worker_event_loop(**kwargs):
+    worker_loop.start()
+    precompile_email_templates()  # Build and compile once per worker, not on the first email
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect  # Solo/threads pools run tasks in the main process
+def stop_worker_event_loop(**kwargs):
+    worker_loop.stop()
+
+
 # Optional: If you need to pass app context to tasks (e.g., for DB access, though it's better to pass IDs)
 # class ContextTask(celery_app.Task):
 #     def __call__(self, *args, **kwargs):
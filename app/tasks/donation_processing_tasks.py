@@ -47,20 +47,21 @@ def send_donation_confirmation_email_task(
     from app.services.email_service import (
         send_email_async,
     )  # Local import to avoid circular deps if any
-    import asyncio
+    from app.services.email_templates import get_email_template
+    from app.tasks.async_runtime import run_async
 
-    subject = "Thank You for Your Donation!"
-    html_content = f"<p>Dear Donor,</p><p>Thank you for your generous donation of ${donation_amount} on {donation_date}.</p>"
-    text_content = f"Dear Donor,\nThank you for your generous donation of ${donation_amount} on {donation_date}."
+    email = get_email_template("donation_confirmation").render(
+        {"donation_amount": donation_amount, "donation_date": donation_date}
+    )
 
     logger.info(f"Task send_donation_confirmation_email: Sending to {user_email}")
     try:
-        success = asyncio.run(
+        success = run_async(
             send_email_async(
                 to_email=user_email,
-                subject=subject,
-                html_content=html_content,
-                text_content=text_content,
+                subject=email.subject,
+                html_content=email.html,
+                text_content=email.text,
             )
         )
         if success:
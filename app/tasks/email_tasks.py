@@ -1,7 +1,11 @@
 # app/tasks/email_tasks.py
-import asyncio
+import smtplib
+from itertools import islice
+from typing import Any, Iterable
+from app.tasks.async_runtime import run_async
 from app.tasks.celery_app import celery_app
-from app.services.email_service import send_email_async
+from app.services.email_service import send_bulk_email_async, send_email_async
+from app.services.email_templates import get_email_template
 from app.core.config import settings  # For logging and checking environment
 import logging
 
@@ -10,72 +14,20 @@ logger = logging.getLogger(__name__)
 
 @celery_app.task(name="send_registration_email", bind=True, max_retries=3, default_retry_delay=60)
 def send_registration_email_task(self, user_email: str, username: str):
-    subject = "Welcome to The Ashoka Buddhist Foundation!"
-    # In a real application, you'd use Jinja2 templates for emails
-    # For example, render_template("emails/registration.html", username=username)
-    html_content = f"""
-    <html>
-        <head>
-            <style>
-                body {{ font-family: sans-serif; margin: 20px; color: #333; }}
-                h1 {{ color: #4CAF50; }}
-                p {{ line-height: 1.6; }}
-                .footer {{ font-size: 0.9em; color: #777; margin-top: 30px; }}
-            </style>
-        </head>
-        <body>
-            <h1>Welcome, {username}!</h1>
-            <p>Thank you for registering at The Ashoka Buddhist Foundation.</p>
-            <p>We are delighted to have you as part of our community focused on promoting peace, wisdom, and compassion through the teachings of Buddhism.</p>
-            <p>Explore our resources, join discussions, and participate in events to deepen your understanding and practice.</p>
-            <p>If you have any questions or need assistance, please do not hesitate to contact us.</p>
-            <br>
-            <p>Warm regards,</p>
-            <p>The Ashoka Buddhist Foundation Team</p>
-            <div class="footer">
-                <p>&copy; {{{{ now().year }}}} The Ashoka Buddhist Foundation. All rights reserved.</p>
-                <p><a href="{settings.WEB_APP_BASE_URL}">Visit our website</a></p>
-            </div>
-        </body>
-    </html>
-    """  # Note: Jinja2 syntax like {{ now().year }} won't work here directly.
-    # It's better to render this with a proper template engine before passing to the email service.
-    # For now, let's make it simple:
-    html_content = html_content.replace(
-        "{{{{ now().year }}}}",
-        str(asyncio.run(asyncio.sleep(0, result=__import__("datetime").datetime.now().year))),
-    )
-
-    text_content = f"""
-    Welcome, {username}!
-
-    Thank you for registering at The Ashoka Buddhist Foundation.
-    We are delighted to have you as part of our community focused on promoting peace, wisdom, and compassion through the teachings of Buddhism.
-
-    Explore our resources, join discussions, and participate in events to deepen your understanding and practice.
-
-    If you have any questions or need assistance, please do not hesitate to contact us.
-
-    Warm regards,
-    The Ashoka Buddhist Foundation Team
-
-    ---
-    Visit our website: {settings.WEB_APP_BASE_URL}
-    """
+    email = get_email_template("registration").render({"username": username})
 
     logger.info(
         f"Task send_registration_email: Attempting to send to {user_email} for user {username}."
     )
 
     try:
-        # Call the async function from the synchronous Celery task
-        # asyncio.run() is suitable here as each task execution is independent.
-        success = asyncio.run(
+        # Call the async function from the synchronous Celery task on the worker's loop
+        success = run_async(
             send_email_async(
                 to_email=user_email,
-                subject=subject,
-                html_content=html_content,
-                text_content=text_content,
+                subject=email.subject,
+                html_content=email.html,
+                text_content=email.text,
             )
         )
         if success:
@@ -110,37 +62,19 @@ def send_registration_email_task(self, user_email: str, username: str):
     name="send_password_reset_email", bind=True, max_retries=3, default_retry_delay=120
 )
 def send_password_reset_email_task(self, user_email: str, username: str, reset_token: str):
-    subject = "Password Reset Request - The Ashoka Buddhist Foundation"
     # Ensure this route exists
     reset_link = f"{settings.WEB_APP_BASE_URL}/auth/reset-password?token={reset_token}"
-    html_content = f"""
-    <p>Hello {username},</p>
-    <p>You requested a password reset. Please click the link below to set a new password:</p>
-    <p><a href='{reset_link}'>{reset_link}</a></p>
-    <p>If you did not request this, please ignore this email.</p>
-    <p>This link will expire in 1 hour.</p>
-    <br><p>Regards,<br>The Ashoka Buddhist Foundation Team</p>
-    """
-    text_content = f"""
-    Hello {username},
-
-    You requested a password reset. Please use the following link to set a new password:
-    {reset_link}
-
-    If you did not request this, please ignore this email.
-    This link will expire in 1 hour.
-
-    Regards,
-    The Ashoka Buddhist Foundation Team
-    """
+    email = get_email_template("password_reset").render(
+        {"username": username, "reset_link": reset_link}
+    )
     logger.info(f"Task send_password_reset_email: Attempting to send to {user_email}.")
     try:
-        success = asyncio.run(
+        success = run_async(
             send_email_async(
                 to_email=user_email,
-                subject=subject,
-                html_content=html_content,
-                text_content=text_content,
+                subject=email.subject,
+                html_content=email.html,
+                text_content=email.text,
             )
         )
         if success:
@@ -158,3 +92,72 @@ def send_password_reset_email_task(self, user_email: str, username: str, reset_t
             exc_info=True,
         )
         raise self.retry(exc=e)
+
+
+def _is_permanent_failure(error: Exception) -> bool:
+    """5xx replies (unknown mailbox, rejected content, ...) will fail again on a retry."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in error.recipients.values()]
+        return bool(codes) and all(code >= 500 for code in codes)
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+@celery_app.task(name="send_bulk_email", bind=True, max_retries=3, default_retry_delay=300)
+def send_bulk_email_task(
+    self,
+    recipients: list[dict[str, Any]],
+    template_id: str,
+    context: dict[str, Any] | None = None,
+    report: dict[str, Any] | None = None,
+):
+    """
+    Sends the email template `template_id` to every recipient. Each recipient is a dict
+    with "email" plus its own template variables (e.g. "name"); `context` is shared.
+    Queue large mailings with `queue_bulk_email`, which splits them into tasks.
+    Retries re-send only to the recipients that failed with a transient error; `report`
+    carries the outcome of earlier attempts. Returns counts plus the failures:
+    {"template_id": ..., "sent": <count>, "failed": {email: error}}.
+    """
+    report = report or {"template_id": template_id, "sent": 0, "failed": {}}
+    logger.info(
+        f"Task send_bulk_email: Sending '{template_id}' to {len(recipients)} recipients "
+        f"(attempt {self.request.retries + 1})."
+    )
+    failures = run_async(send_bulk_email_async(recipients, template_id, context))
+
+    retryable = []
+    for recipient in recipients:
+        error = failures.get(recipient["email"])
+        if error is None:
+            report["sent"] += 1
+            report["failed"].pop(recipient["email"], None)
+            continue
+        report["failed"][recipient["email"]] = str(error)
+        if not _is_permanent_failure(error):
+            retryable.append(recipient)
+
+    logger.info(
+        f"Task send_bulk_email: '{template_id}': {report['sent']} sent, "
+        f"{len(report['failed'])} failed ({len(retryable)} retryable)."
+    )
+    if retryable and self.request.retries < self.max_retries:
+        raise self.retry(args=(retryable, template_id, context), kwargs={"report": report})
+    return report
+
+
+def queue_bulk_email(
+    recipients: Iterable[dict[str, Any]],
+    template_id: str,
+    context: dict[str, Any] | None = None,
+) -> list[str]:
+    """
+    Queues a mailing as send_bulk_email tasks of EMAIL_BULK_TASK_SIZE recipients each, so
+    no single task message carries the whole list. `recipients` may be an iterator (e.g.
+    streamed from the database); it is consumed one batch at a time. Returns the task ids.
+    """
+    task_ids = []
+    recipients = iter(recipients)
+    while batch := list(islice(recipients, settings.EMAIL_BULK_TASK_SIZE)):
+        task_ids.append(send_bulk_email_task.delay(batch, template_id, context).id)
+    logger.info(f"Queued bulk email '{template_id}' as {len(task_ids)} tasks.")
+    return task_ids
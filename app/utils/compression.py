@@ -0,0 +1,65 @@
+# app/utils/compression.py
+import gzip
+import zlib
+
+try:  # Brotli is optional; gzip is always available
+    import brotli
+except ImportError:  # pragma: no cover - depends on the deployment image
+    brotli = None
+
+
+def negotiate_encoding(accept_encoding: str) -> str:
+    """Picks "br", "gzip" or "identity" from an Accept-Encoding header, preferring brotli."""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = params.strip().replace(" ", "")
+        if q.startswith("q=") and q[2:] in ("0", "0.0", "0.00", "0.000"):
+            continue
+        accepted.add(coding)
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return "identity"
+
+
+def compress_body(body: bytes, encoding: str, *, level: int = 9) -> bytes:
+    """
+    Compresses `body` for the given content-coding. `level` is on the gzip 1-9 scale and
+    is mapped onto brotli's 0-11 quality scale.
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=min(11, round(level * 11 / 9)))
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    return body
+
+
+class StreamingCompressor:
+    """
+    Incremental br/gzip compressor for streamed bodies. Every `compress()` call flushes,
+    so each chunk reaches the client as soon as it is produced.
+    """
+
+    def __init__(self, encoding: str, *, level: int = 5):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=min(11, round(level * 11 / 9)))
+        elif encoding == "gzip":
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 -> gzip wrapper
+        else:
+            raise ValueError(f"Unsupported streaming encoding: {encoding}")
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
@@ -0,0 +1,242 @@
+# app/utils/rate_limiter.py
+import logging
+import math
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Literal, Optional
+
+import redis.asyncio as aioredis
+from fastapi import HTTPException, Request, status
+from redis.commands.core import AsyncScript
+
+from app.core.config import settings
+from app.db.database import redis_pool
+from app.utils.ttl_cache import TTLLRUCache
+
+logger = logging.getLogger(__name__)
+
+# --- Lua scripts (run atomically inside Redis; time comes from the Redis server clock) ---
+
+# Sliding-window log: one sorted-set member per hit, scored by its timestamp in ms.
+# Returns {allowed (0/1), remaining, retry_after_ms}.
+SLIDING_WINDOW_LUA = """
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local member = ARGV[4]
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+redis.call('ZREMRANGEBYSCORE', key, 0, now - window_ms)
+local count = redis.call('ZCARD', key)
+if count + cost > limit then
+    local retry_after = window_ms
+    local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+    if oldest[2] then
+        retry_after = window_ms - (now - tonumber(oldest[2]))
+    end
+    return {0, limit - count, retry_after}
+end
+for i = 1, cost do
+    redis.call('ZADD', key, now, member .. ':' .. i)
+end
+redis.call('PEXPIRE', key, window_ms)
+return {1, limit - count - cost, 0}
+"""
+
+# Token bucket: `limit` tokens, refilled continuously at limit / window.
+# Returns {allowed (0/1), remaining, retry_after_ms}.
+TOKEN_BUCKET_LUA = """
+local key = KEYS[1]
+local capacity = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local rate = capacity / window_ms
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local data = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = math.ceil((cost - tokens) / rate)
+end
+redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', key, window_ms * 2)
+return {allowed, math.floor(tokens), retry_after}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    name: str
+    limit: int  # Requests allowed...
+    period: int  # ...per this many seconds
+    algorithm: Literal["sliding_window", "token_bucket"] = "sliding_window"
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    remaining: int
+    retry_after: float  # Seconds
+
+
+class _LocalBucket:
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, tokens: float, updated_at: float):
+        self.tokens = tokens
+        self.updated_at = updated_at
+
+
+class RateLimiter:
+    """
+    Distributed rate limiter backed by atomic Lua scripts over `redis_pool`.
+
+    Each worker also keeps an in-process pre-filter that rejects without a Redis round trip:
+    - a local token bucket per key: a worker only sees part of the traffic, so if the local
+      bucket is empty the global limit is certainly exceeded as well;
+    - the "blocked until" time of keys Redis recently rejected.
+    If Redis is unreachable the limiter fails open (only the local pre-filter applies).
+    """
+
+    def __init__(self, *, key_prefix: str = "rate_limit:", local_maxsize: int = 10000):
+        self.key_prefix = key_prefix
+        self._local_buckets: TTLLRUCache[_LocalBucket] = TTLLRUCache(local_maxsize, 3600)
+        self._blocked_until: TTLLRUCache[float] = TTLLRUCache(local_maxsize, 3600)
+        self._scripts: dict[str, AsyncScript] = {}
+        self.local_rejections = 0
+        self.redis_rejections = 0
+
+    def _script(self, algorithm: str) -> AsyncScript:
+        if algorithm not in self._scripts:
+            client = aioredis.Redis(connection_pool=redis_pool)
+            lua = SLIDING_WINDOW_LUA if algorithm == "sliding_window" else TOKEN_BUCKET_LUA
+            self._scripts[algorithm] = client.register_script(lua)
+        return self._scripts[algorithm]
+
+    def _local_check(self, rule: RateLimitRule, key: str, cost: int) -> Optional[RateLimitResult]:
+        """Returns a rejection if the pre-filter can already tell the request is over the limit."""
+        now = time.monotonic()
+        blocked_until = self._blocked_until.get(key)
+        if blocked_until is not None and blocked_until > now:
+            return RateLimitResult(allowed=False, remaining=0, retry_after=blocked_until - now)
+
+        bucket = self._local_buckets.get(key)
+        if bucket is None:
+            bucket = _LocalBucket(tokens=rule.limit, updated_at=now)
+            self._local_buckets.set(key, bucket, ttl=rule.period * 2)
+        rate = rule.limit / rule.period
+        bucket.tokens = min(rule.limit, bucket.tokens + (now - bucket.updated_at) * rate)
+        bucket.updated_at = now
+        if bucket.tokens < cost:
+            return RateLimitResult(
+                allowed=False, remaining=0, retry_after=(cost - bucket.tokens) / rate
+            )
+        bucket.tokens -= cost
+        return None
+
+    async def hit(self, rule: RateLimitRule, identifier: str, cost: int = 1) -> RateLimitResult:
+        """Counts one request for `identifier` under `rule` and says whether it is allowed."""
+        key = f"{self.key_prefix}{rule.name}:{identifier}"
+        local_result = self._local_check(rule, key, cost)
+        if local_result is not None:
+            self.local_rejections += 1
+            return local_result
+
+        try:
+            allowed, remaining, retry_after_ms = await self._script(rule.algorithm)(
+                keys=[key], args=[rule.limit, rule.period * 1000, cost, uuid.uuid4().hex]
+            )
+        except Exception as e:
+            logger.warning(f"Rate limiter: Redis unavailable for {key}, failing open: {e}")
+            return RateLimitResult(allowed=True, remaining=rule.limit, retry_after=0)
+
+        result = RateLimitResult(
+            allowed=bool(allowed),
+            remaining=max(0, int(remaining)),
+            retry_after=retry_after_ms / 1000,
+        )
+        if not result.allowed:
+            self.redis_rejections += 1
+            self._blocked_until.set(
+                key, time.monotonic() + result.retry_after, ttl=result.retry_after + 1
+            )
+        return result
+
+    async def enforce(self, rule: RateLimitRule, identifier: str, cost: int = 1) -> None:
+        """Like `hit`, but raises 429 with Retry-After when the limit is exceeded."""
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        result = await self.hit(rule, identifier, cost)
+        if not result.allowed:
+            retry_after = max(1, math.ceil(result.retry_after))
+            logger.warning(f"Rate limit '{rule.name}' exceeded for {identifier}.")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Too many attempts. Please try again in {retry_after} seconds.",
+                headers={"Retry-After": str(retry_after)},
+            )
+
+
+rate_limiter = RateLimiter()
+
+
+def client_ip(request: Request) -> str:
+    """Client IP; honours the first X-Forwarded-For hop only when the proxy is trusted."""
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded_for = request.headers.get("x-forwarded-for")
+        if forwarded_for:
+            return forwarded_for.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(
+    rule: RateLimitRule,
+    key_func: Callable[[Request], str | Awaitable[str]] = client_ip,
+) -> Callable[[Request], Awaitable[None]]:
+    """
+    FastAPI dependency factory. Use on a route decorator:
+
+        @router.post("/login", dependencies=[Depends(rate_limit(LOGIN_PER_IP))])
+
+    `key_func` picks the identifier (client IP by default); it may be async.
+    """
+
+    async def dependency(request: Request) -> None:
+        identifier = key_func(request)
+        if not isinstance(identifier, str):
+            identifier = await identifier
+        await rate_limiter.enforce(rule, identifier)
+
+    return dependency
+
+
+# --- Rules for the auth endpoints ---
+LOGIN_PER_IP = RateLimitRule(
+    "login_ip", settings.RATE_LIMIT_LOGIN_PER_IP, settings.RATE_LIMIT_WINDOW_SECONDS
+)
+LOGIN_PER_ACCOUNT = RateLimitRule(
+    "login_account",
+    settings.RATE_LIMIT_LOGIN_PER_ACCOUNT,
+    settings.RATE_LIMIT_ACCOUNT_WINDOW_SECONDS,
+)
+REGISTER_PER_IP = RateLimitRule(
+    "register_ip", settings.RATE_LIMIT_REGISTER_PER_IP, settings.RATE_LIMIT_WINDOW_SECONDS
+)
+REFRESH_PER_IP = RateLimitRule(
+    "refresh_ip",
+    settings.RATE_LIMIT_REFRESH_PER_IP,
+    settings.RATE_LIMIT_WINDOW_SECONDS,
+    algorithm="token_bucket",
+)
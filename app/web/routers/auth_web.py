@@ -15,7 +15,16 @@ from app.core.security import (
     set_auth_cookies,
 )
 from app.db.models.user_model import User
-from app.core.templating import templates
+from app.core.templating import stream_template
+from app.utils.rate_limiter import (
+    LOGIN_PER_ACCOUNT,
+    LOGIN_PER_IP,
+    REFRESH_PER_IP,
+    REGISTER_PER_IP,
+    client_ip,
+    rate_limit,
+    rate_limiter,
+)
 
 router = APIRouter(prefix="/auth", tags=["Web Authentication"])
 
@@ -68,9 +77,9 @@ async def login_get(
         return RedirectResponse(
             url=request.url_for("dashboard_page"), status_code=status.HTTP_302_FOUND
         )
-    template = templates.get_template("auth/login.html")
-    content = await template.render_async({"request": request, "title": "Login", "form_data": {}})
-    return HTMLResponse(content)
+    return await stream_template(
+        "auth/login.html", {"request": request, "title": "Login", "form_data": {}}
+    )
 
 
 @router.post("/login", name="login_post")
@@ -83,6 +92,10 @@ async def login_post(
     form_repopulate_data = {"username_or_email": username_or_email}
 
     try:
+        # Checked inside the try so a 429 re-renders the form like any other login error
+        await rate_limiter.enforce(LOGIN_PER_IP, client_ip(request))
+        await rate_limiter.enforce(LOGIN_PER_ACCOUNT, username_or_email.strip().lower())
+
         # Pydantic validation now uses the stricter UserLoginSchema
         # with its custom validator for username_or_email.
         form_data_model = user_schemas.UserLoginSchema(
@@ -114,29 +127,29 @@ async def login_post(
         # Or, stick to a very generic one:
         # error_detail = "Invalid username/email or password. Please check your input and try again."
 
-        template = templates.get_template("auth/login.html")
         context = {
             "request": request,
             "title": "Login",
             "form_data": form_repopulate_data,
             "error_message": error_detail,
         }
-        content = await template.render_async(context)
-        return HTMLResponse(content, status_code=status.HTTP_400_BAD_REQUEST)
+        return await stream_template(
+            "auth/login.html", context, status_code=status.HTTP_400_BAD_REQUEST
+        )
 
     except HTTPException as e:
-        template = templates.get_template("auth/login.html")
         context = {
             "request": request,
             "title": "Login",
             "form_data": form_repopulate_data,
             "error_message": e.detail,  # e.g., "Invalid credentials" from service layer
         }
-        content = await template.render_async(context)
         response_status_code = (
             e.status_code if hasattr(e, "status_code") else status.HTTP_400_BAD_REQUEST
         )
-        return HTMLResponse(content, status_code=response_status_code)
+        return await stream_template(
+            "auth/login.html", context, status_code=response_status_code, headers=e.headers
+        )
 
 
 @router.get("/register", response_class=HTMLResponse, name="register_page")
@@ -148,11 +161,9 @@ async def register_get(
         return RedirectResponse(
             url=request.url_for("dashboard_page"), status_code=status.HTTP_302_FOUND
         )
-    template = templates.get_template("auth/register.html")
-    content = await template.render_async(
-        {"request": request, "title": "Register", "form_data": {}}
+    return await stream_template(
+        "auth/register.html", {"request": request, "title": "Register", "form_data": {}}
     )
-    return HTMLResponse(content)
 
 
 @router.post("/register", name="register_post")
@@ -208,7 +219,6 @@ async def register_post(
         if not error_message and field_errors:  # Fallback
             error_message = "Registration failed. Please correct the errors highlighted below."
 
-        template = templates.get_template("auth/register.html")
         context = {
             "request": request,
             "title": "Register",
@@ -216,11 +226,14 @@ async def register_post(
             "error_message": error_message,
             "errors": field_errors,  # field_errors from confirm_password and _validate_password_strength
         }
-        content = await template.render_async(context)
-        return HTMLResponse(content, status_code=status.HTTP_400_BAD_REQUEST)
+        return await stream_template(
+            "auth/register.html", context, status_code=status.HTTP_400_BAD_REQUEST
+        )
 
     # 4. If initial custom validations passed, proceed to Pydantic schema validation and service layer
     try:
+        await rate_limiter.enforce(REGISTER_PER_IP, client_ip(request))
+
         # Pydantic UserCreate schema will now apply its strict rules (min/max length, regex, bleach, etc.)
         # This includes password min_length=12.
         user_in_schema = user_schemas.UserCreate(
@@ -295,7 +308,6 @@ async def register_post(
     if (
         caught_exception or error_message
     ):  # error_message might be set by initial checks even if no exception
-        template = templates.get_template("auth/register.html")
         context = {
             "request": request,
             "title": "Register",
@@ -303,14 +315,20 @@ async def register_post(
             "error_message": error_message if error_message else "An error occurred.",
             "errors": field_errors,
         }
-        content = await template.render_async(context)
 
         response_status_code = status.HTTP_400_BAD_REQUEST
+        response_headers = None
         if isinstance(caught_exception, HTTPException):
             response_status_code = caught_exception.status_code
+            response_headers = caught_exception.headers  # e.g. Retry-After on 429/503
         # For ValidationError (Pydantic), 400 is fine for HTML forms.
 
-        return HTMLResponse(content, status_code=response_status_code)
+        return await stream_template(
+            "auth/register.html",
+            context,
+            status_code=response_status_code,
+            headers=response_headers,
+        )
 
     # Fallback
     request.session["flash_error"] = "An unexpected error occurred during registration."
@@ -329,7 +347,11 @@ async def logout(request: Request):
     return actual_response
 
 
-@router.post("/refresh-token", name="refresh_token_web")
+@router.post(
+    "/refresh-token",
+    name="refresh_token_web",
+    dependencies=[Depends(rate_limit(REFRESH_PER_IP))],
+)
 async def handle_refresh_token_web(
     request: Request,
     db: AsyncSession = Depends(database.get_async_db),
@@ -348,7 +370,8 @@ async def handle_refresh_token_web(
     except HTTPException as e:
         error_response_content = {"detail": e.detail}
         actual_error_response = JSONResponse(
-            content=error_response_content, status_code=e.status_code
+            content=error_response_content, status_code=e.status_code, headers=e.headers
         )
-        clear_auth_cookies(actual_error_response)
+        if e.status_code != status.HTTP_503_SERVICE_UNAVAILABLE:  # Transient: keep the session
+            clear_auth_cookies(actual_error_response)
         return actual_error_response
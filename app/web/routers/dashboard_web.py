@@ -5,6 +5,7 @@ from app.core.security import get_current_active_user_web  # Ensures active user
 from app.db.models.user_model import User  # For type hinting
 from app.core.templating import templates  # Import global templates instance
 from app.core.config import settings
+from app.core.activity_recorder import activity_recorder
 from app.db.schemas import user_schemas, token_schemas  # Added this import
 
 router = APIRouter(prefix="/dashboard", tags=["Web Dashboard"])
@@ -30,6 +31,12 @@ async def dashboard_get(
 
     template = templates.get_template("dashboard/dashboard.html")
     content = await template.render_async(
-        {"request": request, "title": "My Dashboard", "current_user": current_user}
+        {
+            "request": request,
+            "title": "My Dashboard",
+            "current_user": current_user,
+            # The user row may lag behind the write-behind buffer
+            "last_login_at": await activity_recorder.last_login_at(current_user),
+        }
     )
     return HTMLResponse(content)
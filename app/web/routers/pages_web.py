@@ -3,7 +3,7 @@ from fastapi.responses import HTMLResponse  # Ensure HTMLResponse is imported
 from app.core.security import get_current_user_from_cookie_web  # Optional user
 from app.db.models.user_model import User  # For type hinting
 from typing import Optional
-from app.core.templating import templates
+from app.core.page_cache import page_cache
 
 router = APIRouter(tags=["Web Pages"])
 
@@ -13,14 +13,13 @@ async def home_page(
     request: Request,
     current_user: Optional[User] = Depends(get_current_user_from_cookie_web),
 ):
-    # Get the template object
-    template = templates.get_template("pages/index.html")
-    # Render the template asynchronously
-    content = await template.render_async(
-        {"request": request, "current_user": current_user, "title": "Home"}
+    # Anonymous renders are served from the page cache (see app.core.page_cache)
+    return await page_cache.render(
+        request,
+        "pages/index.html",
+        {"request": request, "current_user": current_user, "title": "Home"},
+        current_user=current_user,
     )
-    # Return an HTMLResponse with the rendered content
-    return HTMLResponse(content)
 
 
 @router.get("/about", response_class=HTMLResponse, name="about_page")
@@ -28,37 +27,33 @@ async def about_page(
     request: Request,
     current_user: Optional[User] = Depends(get_current_user_from_cookie_web),
 ):
-    # Get the template object
-    template = templates.get_template("pages/about.html")
-    # Render the template asynchronously
-    content = await template.render_async(
-        {"request": request, "current_user": current_user, "title": "About Us"}
+    return await page_cache.render(
+        request,
+        "pages/about.html",
+        {"request": request, "current_user": current_user, "title": "About Us"},
+        current_user=current_user,
     )
-    # Return an HTMLResponse with the rendered content
-    return HTMLResponse(content)
 
 
 @router.get("/privacy-policy", response_class=HTMLResponse, name="privacy_policy_page")
 async def privacy_policy_page(
     request: Request, current_user: Optional[User] = Depends(get_current_user_from_cookie_web)
 ):
-    template = templates.get_template("pages/privacy_policy.html")
-    # Render the template asynchronously
-    content = await template.render_async(
-        {"request": request, "current_user": current_user, "title": "Privacy Policy"}
+    return await page_cache.render(
+        request,
+        "pages/privacy_policy.html",
+        {"request": request, "current_user": current_user, "title": "Privacy Policy"},
+        current_user=current_user,
     )
-    # Return an HTMLResponse with the rendered content
-    return HTMLResponse(content)
 
 
 @router.get("/terms-of-service", response_class=HTMLResponse, name="terms_of_service_page")
 async def terms_of_service_page(
     request: Request, current_user: Optional[User] = Depends(get_current_user_from_cookie_web)
 ):
-    template = templates.get_template("pages/terms_of_service.html")
-    # Render the template asynchronously
-    content = await template.render_async(
-        {"request": request, "current_user": current_user, "title": "Terms of Service"}
+    return await page_cache.render(
+        request,
+        "pages/terms_of_service.html",
+        {"request": request, "current_user": current_user, "title": "Terms of Service"},
+        current_user=current_user,
     )
-    # Return an HTMLResponse with the rendered content
-    return HTMLResponse(content)